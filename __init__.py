@@ -3,7 +3,6 @@ GUVNL Queue Management System - Flask Application Factory
 """
 
 import os
-import logging
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
@@ -33,14 +32,24 @@ def create_app(config_name=None):
         app.config.from_object('config.ProductionConfig')
     elif config_name == 'testing':
         app.config.from_object('config.TestingConfig')
+    elif config_name == 'benchmark':
+        app.config.from_object('config.BenchmarkConfig')
     else:
         app.config.from_object('config.DevelopmentConfig')
     
+    # Fast JSON encoding for API responses
+    from app.utils.json_provider import init_json_provider
+    init_json_provider(app)
+    
+    # Cooperative psycopg2 and pool metrics; must precede engine creation
+    from app.utils.green_db import init_green_db
+    init_green_db(app)
+    
     # Initialize extensions with app
     db.init_app(app)
     migrate.init_app(app, db)
     jwt.init_app(app)
-    socketio.init_app(app, async_mode='eventlet')
+    socketio.init_app(app, async_mode='eventlet', message_queue=app.config['SOCKETIO_MESSAGE_QUEUE'])
     
     # Configure CORS
     CORS(app, resources={
@@ -58,13 +67,47 @@ def create_app(config_name=None):
     metrics = PrometheusMetrics(app)
     metrics.info('app_info', 'GUVNL Queue Management System', version='1.0.0')
     
+    # Initialize per-request/per-task database instrumentation
+    if app.config['DB_INSTRUMENTATION_ENABLED']:
+        from app.utils.db_instrumentation import db_instrumentation
+        db_instrumentation.init_app(app)
+    
+    # Initialize cached system settings
+    from app.services.settings_service import settings_service
+    settings_service.init_app(app)
+    
+    # Initialize Redis-backed user sessions (idle timeout, logout everywhere)
+    from app.services.session_service import session_store
+    session_store.init_app(app)
+    
+    # Initialize live queue position index
+    from app.services.queue_position_service import queue_positions
+    queue_positions.init_app(app)
+    if app.config['QUEUE_INDEX_REBUILD_ON_STARTUP']:
+        try:
+            with app.app_context():
+                queue_positions.ensure_built()
+        except Exception as e:
+            app.logger.warning(f"Queue position index not rebuilt at startup: {str(e)}")
+    
+    # Initialize staff dashboard aggregates (refresh loop starts on first use)
+    from app.services.dashboard_service import dashboard_aggregates
+    dashboard_aggregates.init_app(app)
+    
+    # Initialize catalog response cache
+    from app.services.catalog_cache import catalog_cache
+    catalog_cache.init_app(app)
+    
     # Register blueprints
-    from app.routes import auth, appointments, queues, admin, notifications
+    from app.routes import auth, appointments, queues, admin, notifications, catalog, exports, dashboard
     app.register_blueprint(auth.bp, url_prefix='/api/auth')
     app.register_blueprint(appointments.bp, url_prefix='/api/appointments')
     app.register_blueprint(queues.bp, url_prefix='/api/queues')
+    app.register_blueprint(dashboard.bp, url_prefix='/api/admin')
     app.register_blueprint(admin.bp, url_prefix='/api/admin')
+    app.register_blueprint(exports.bp, url_prefix='/api/admin/exports')
     app.register_blueprint(notifications.bp, url_prefix='/api/notifications')
+    app.register_blueprint(catalog.bp, url_prefix='/api')
     
     # Register SocketIO events
     from app.routes import socket_events
@@ -107,6 +150,8 @@ def create_app(config_name=None):
                 'queues': '/api/queues',
                 'admin': '/api/admin',
                 'notifications': '/api/notifications',
+                'offices': '/api/offices',
+                'services': '/api/services',
                 'docs': '/api/docs',
                 'health': '/health'
             }
@@ -114,15 +159,8 @@ def create_app(config_name=None):
     
     # Configure logging
     if not app.debug and not app.testing:
-        if not os.path.exists('logs'):
-            os.mkdir('logs')
-        file_handler = logging.FileHandler('logs/guvnl_api.log')
-        file_handler.setFormatter(logging.Formatter(
-            '%(asctime)s %(levelname)s: %(message)s [in %(pathname)s:%(lineno)d]'
-        ))
-        file_handler.setLevel(logging.INFO)
-        app.logger.addHandler(file_handler)
-        app.logger.setLevel(logging.INFO)
+        from app.utils.logging_config import configure_logging
+        configure_logging(app)
         app.logger.info('GUVNL Queue Management API startup')
     
     return app
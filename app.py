@@ -4,6 +4,13 @@ GUVNL Queue Management System - Main Application Entry Point
 """
 
 import os
+
+# Socket.IO runs on eventlet; patch sockets before anything opens one
+if os.getenv('EVENTLET_MONKEY_PATCH', 'true').lower() == 'true':
+    import eventlet
+    eventlet.monkey_patch()
+
+import click
 from dotenv import load_dotenv
 from app import create_app, db, socketio, make_celery
 
@@ -16,10 +23,9 @@ app = create_app(os.getenv('FLASK_ENV', 'development'))
 # Initialize Celery with Flask app context
 celery = make_celery(app)
 
-@app.before_first_request
-def create_tables():
-    """Create database tables on first request"""
-    db.create_all()
+# Schema creation stays out of the request path: run `init-db` (or the
+# migrations) before starting the server. Production runs under gunicorn
+# with wsgi.py and gunicorn.conf.py.
 
 @app.cli.command()
 def init_db():
@@ -55,9 +61,84 @@ def reset_db():
     else:
         print("Database reset cancelled.")
 
+@app.cli.command()
+@click.option('--csv-dir', type=click.Path(exists=True, file_okay=False),
+              help='Load <table>.csv files (with header rows) from this directory')
+@click.option('--table', 'tables', multiple=True, help='Only these tables (default: every CSV in --csv-dir)')
+@click.option('--synthetic', is_flag=True, help='Generate the synthetic load-test dataset instead')
+@click.option('--seed', default=42, show_default=True, help='Seed for --synthetic')
+@click.option('--users', default=1_000_000, show_default=True, help='Citizens for --synthetic')
+@click.option('--offices', default=48, show_default=True, help='Offices for --synthetic')
+@click.option('--days', default=2, show_default=True, help='Days of queues for --synthetic')
+@click.option('--appointments-per-queue', default=120, show_default=True, help='Appointments per queue for --synthetic')
+@click.option('--workers', type=int, help='Parallel COPY connections (default: BULK_LOAD_WORKERS)')
+@click.option('--keep-indexes', is_flag=True, help='Load with indexes, constraints and triggers in place')
+def bulk_load(csv_dir, tables, synthetic, seed, users, offices, days, appointments_per_queue, workers, keep_indexes):
+    """Bulk load CSV files or the synthetic dataset with COPY FROM STDIN"""
+    from app.utils.bulk_loader import BulkLoader, csv_directory_jobs
+    from app.services.catalog_cache import CATALOG_TABLES, catalog_cache
+    
+    workers = workers or app.config['BULK_LOAD_WORKERS']
+    if synthetic:
+        from benchmarks.seed import DatasetSpec, seed_database
+        
+        spec = DatasetSpec(seed=seed, users=users, offices=offices, days=days,
+                           appointments_per_queue=appointments_per_queue)
+        seed_database(db.engine, spec, workers=workers, defer_indexes=not keep_indexes)
+        # COPY bypasses the ORM hooks that invalidate cached catalog responses
+        catalog_cache.bump()
+        return
+    
+    if not csv_dir:
+        raise click.UsageError('Pass --csv-dir or --synthetic')
+    
+    jobs = csv_directory_jobs(csv_dir, tables or None)
+    print(f"Loading {', '.join(job.table for job in jobs)} with {workers} workers...")
+    loader = BulkLoader(db.engine, workers=workers,
+                        maintenance_work_mem=app.config['BULK_LOAD_MAINTENANCE_WORK_MEM'])
+    report = loader.load(jobs, defer_indexes=not keep_indexes)
+    for line in report.lines():
+        print(line)
+    if CATALOG_TABLES.intersection(report.rows):
+        catalog_cache.bump()
+
+@app.cli.command()
+def rebuild_queue_index():
+    """Rebuild the live queue position index from the appointments table"""
+    from app.services.queue_position_service import queue_positions
+    
+    total = queue_positions.rebuild()
+    print(f"Queue position index rebuilt with {total} waiting appointments")
+
+@app.cli.command()
+@click.argument('table', type=click.Choice(['appointments', 'notifications']))
+@click.option('--format', 'fmt', type=click.Choice(['csv', 'ndjson', 'json']), default='csv')
+@click.option('--from', 'date_from', type=click.DateTime(formats=['%Y-%m-%d']), help='First date (inclusive)')
+@click.option('--to', 'date_to', type=click.DateTime(formats=['%Y-%m-%d']), help='Last date (inclusive)')
+@click.option('--office', 'office_id', type=click.UUID, help='Only rows for this office id')
+@click.option('--gzip', 'compress', is_flag=True, help='Gzip the output')
+@click.option('--output', '-o', help='Output file (default: generated name in the current directory)')
+def export_data(table, fmt, date_from, date_to, office_id, compress, output):
+    """Export appointments or notifications using a server-side cursor"""
+    from app.services.export_service import ExportService, write_export
+    
+    path = output or ExportService.filename(table, fmt, compress)
+    print(f"Exporting {table} to {path}...")
+    size = write_export(
+        path, table, fmt, compress,
+        date_from=date_from.date() if date_from else None,
+        date_to=date_to.date() if date_to else None,
+        office_id=str(office_id) if office_id else None
+    )
+    print(f"Export complete: {size} bytes")
+
 if __name__ == '__main__':
     # Run the application
     if os.getenv('FLASK_ENV') == 'development':
+        # Create missing tables once, before serving
+        with app.app_context():
+            db.create_all()
+        
         # Development server with hot reload
         socketio.run(
             app, 
@@ -72,5 +153,6 @@ if __name__ == '__main__':
             app,
             host='0.0.0.0',
             port=int(os.environ.get('PORT', 5000)),
-            debug=False
+            debug=False,
+            max_size=app.config['GREENLET_CONCURRENCY']
         )
\ No newline at end of file
@@ -11,7 +11,12 @@ from flask_jwt_extended import (
 from werkzeug.security import check_password_hash, generate_password_hash
 from app.models.user import User
 from app.services.auth_service import AuthService
+from app.services.session_service import session_store
+from app.services.push_service import register_device_token, unregister_device_token
 from app.utils.validators import validate_email, validate_phone
+from app.utils.serializers import (
+    USER_SUMMARY, USER_LOGIN, USER_PROFILE, USER_PROFILE_UPDATE, USER_TOKEN
+)
 from app import db
 import uuid
 
@@ -64,19 +69,15 @@ def register():
         db.session.add(user)
         db.session.commit()
         
-        # Create tokens
-        access_token = create_access_token(identity=user.id)
-        refresh_token = create_refresh_token(identity=user.id)
+        # Create tokens bound to a new session
+        session_id = session_store.new_session_id()
+        access_token = create_access_token(identity=user.id, additional_claims={'sid': session_id})
+        refresh_token = create_refresh_token(identity=user.id, additional_claims={'sid': session_id})
+        session_store.create(session_id, user.id, refresh_token)
         
         return jsonify({
             'message': 'User registered successfully',
-            'user': {
-                'id': user.id,
-                'email': user.email,
-                'first_name': user.first_name,
-                'last_name': user.last_name,
-                'role': user.role
-            },
+            'user': USER_SUMMARY.dump(user),
             'access_token': access_token,
             'refresh_token': refresh_token
         }), 201
@@ -113,20 +114,15 @@ def login():
         user.update_last_login()
         db.session.commit()
         
-        # Create tokens
-        access_token = create_access_token(identity=user.id)
-        refresh_token = create_refresh_token(identity=user.id)
+        # Create tokens bound to a new session
+        session_id = session_store.new_session_id()
+        access_token = create_access_token(identity=user.id, additional_claims={'sid': session_id})
+        refresh_token = create_refresh_token(identity=user.id, additional_claims={'sid': session_id})
+        session_store.create(session_id, user.id, refresh_token)
         
         return jsonify({
             'message': 'Login successful',
-            'user': {
-                'id': user.id,
-                'email': user.email,
-                'first_name': user.first_name,
-                'last_name': user.last_name,
-                'role': user.role,
-                'is_verified': user.is_verified
-            },
+            'user': USER_LOGIN.dump(user),
             'access_token': access_token,
             'refresh_token': refresh_token
         }), 200
@@ -146,8 +142,12 @@ def refresh():
         if not user or not user.is_active:
             return jsonify({'message': 'Invalid user'}), 401
         
-        # Create new access token
-        access_token = create_access_token(identity=user.id)
+        # Create new access token in the same session
+        session_id = get_jwt().get('sid')
+        access_token = create_access_token(
+            identity=user.id,
+            additional_claims={'sid': session_id} if session_id else None
+        )
         
         return jsonify({
             'access_token': access_token
@@ -162,12 +162,10 @@ def refresh():
 def logout():
     """Logout user and invalidate token"""
     try:
-        # In a production system, you'd want to blacklist the token
-        # For now, we'll just return success as the frontend will remove the token
-        jti = get_jwt()['jti']
-        
-        # Add token to blacklist (implement blacklist service)
-        # BlacklistService.add_token(jti)
+        # Ending the session revokes its access and refresh tokens
+        session_id = get_jwt().get('sid')
+        if session_id:
+            session_store.end(session_id, get_jwt_identity())
         
         return jsonify({'message': 'Logged out successfully'}), 200
         
@@ -175,6 +173,80 @@ def logout():
         current_app.logger.error(f"Logout error: {str(e)}")
         return jsonify({'message': 'Logout failed'}), 500
 
+@bp.route('/logout-all', methods=['POST'])
+@jwt_required()
+def logout_all():
+    """Logout from every device"""
+    try:
+        ended = session_store.end_all(get_jwt_identity())
+        
+        return jsonify({'message': 'Logged out from all devices', 'sessions_ended': ended}), 200
+        
+    except Exception as e:
+        current_app.logger.error(f"Logout-all error: {str(e)}")
+        return jsonify({'message': 'Logout failed'}), 500
+
+@bp.route('/sessions', methods=['GET'])
+@jwt_required()
+def list_sessions():
+    """Active sessions (devices) of the current user"""
+    try:
+        current_session_id = get_jwt().get('sid')
+        sessions = session_store.active_sessions(get_jwt_identity())
+        for session in sessions:
+            session['current'] = session['id'] == current_session_id
+        
+        return jsonify({'sessions': sessions}), 200
+        
+    except Exception as e:
+        current_app.logger.error(f"Sessions fetch error: {str(e)}")
+        return jsonify({'message': 'Failed to fetch sessions'}), 500
+
+@bp.route('/device-tokens', methods=['POST'])
+@jwt_required()
+def add_device_token():
+    """Register this device's FCM token for push notifications"""
+    try:
+        data = request.get_json() or {}
+        token = data.get('token')
+        platform = data.get('platform')
+        
+        if not token or len(token) > 255:
+            return jsonify({'message': 'token is required (at most 255 characters)'}), 400
+        if platform not in (None, 'android', 'ios', 'web'):
+            return jsonify({'message': 'platform must be android, ios or web'}), 400
+        
+        register_device_token(get_jwt_identity(), token, platform)
+        db.session.commit()
+        
+        return jsonify({'message': 'Device registered'}), 201
+        
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Device token registration error: {str(e)}")
+        return jsonify({'message': 'Failed to register device'}), 500
+
+@bp.route('/device-tokens', methods=['DELETE'])
+@jwt_required()
+def remove_device_token():
+    """Stop push notifications to this device"""
+    try:
+        token = (request.get_json() or {}).get('token')
+        if not token:
+            return jsonify({'message': 'token is required'}), 400
+        
+        removed = unregister_device_token(get_jwt_identity(), token)
+        db.session.commit()
+        
+        if not removed:
+            return jsonify({'message': 'Device not found'}), 404
+        return jsonify({'message': 'Device removed'}), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Device token removal error: {str(e)}")
+        return jsonify({'message': 'Failed to remove device'}), 500
+
 @bp.route('/profile', methods=['GET'])
 @jwt_required()
 def get_profile():
@@ -187,20 +259,7 @@ def get_profile():
             return jsonify({'message': 'User not found'}), 404
         
         return jsonify({
-            'user': {
-                'id': user.id,
-                'email': user.email,
-                'phone': user.phone,
-                'first_name': user.first_name,
-                'last_name': user.last_name,
-                'role': user.role,
-                'is_verified': user.is_verified,
-                'date_of_birth': user.date_of_birth.isoformat() if user.date_of_birth else None,
-                'address': user.address,
-                'profile_picture_url': user.profile_picture_url,
-                'created_at': user.created_at.isoformat(),
-                'last_login_at': user.last_login_at.isoformat() if user.last_login_at else None
-            }
+            'user': USER_PROFILE.dump(user)
         }), 200
         
     except Exception as e:
@@ -244,15 +303,7 @@ def update_profile():
         
         return jsonify({
             'message': 'Profile updated successfully',
-            'user': {
-                'id': user.id,
-                'email': user.email,
-                'phone': user.phone,
-                'first_name': user.first_name,
-                'last_name': user.last_name,
-                'address': user.address,
-                'date_of_birth': user.date_of_birth.isoformat() if user.date_of_birth else None
-            }
+            'user': USER_PROFILE_UPDATE.dump(user)
         }), 200
         
     except Exception as e:
@@ -288,6 +339,9 @@ def change_password():
         user.password_hash = generate_password_hash(data['new_password'])
         db.session.commit()
         
+        # Sign out other devices; this one stays logged in
+        session_store.end_all(user.id, keep=get_jwt().get('sid'))
+        
         return jsonify({'message': 'Password changed successfully'}), 200
         
     except Exception as e:
@@ -308,11 +362,7 @@ def verify_token():
         
         return jsonify({
             'valid': True,
-            'user': {
-                'id': user.id,
-                'email': user.email,
-                'role': user.role
-            }
+            'user': USER_TOKEN.dump(user)
         }), 200
         
     except Exception as e:
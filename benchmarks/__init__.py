@@ -0,0 +1,3 @@
+"""
+Performance benchmarks for GUVNL Queue Management System
+"""
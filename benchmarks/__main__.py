@@ -0,0 +1,92 @@
+"""
+Benchmark suite entry point
+
+    python -m benchmarks seed --users 1000000 --workers 8
+    python -m benchmarks peak --workers 32
+    python -m benchmarks compare results/abc1234-peak.json results/def5678-peak.json
+"""
+
+import argparse
+import json
+import os
+import sys
+from dataclasses import fields
+
+from benchmarks.report import RESULTS_DIR, compare_results, print_summary, write_results
+from benchmarks.scenario import MorningPeak, PeakSpec
+from benchmarks.seed import DatasetSpec, redate_dataset, seed_database
+
+MANIFEST_PATH = os.path.join(RESULTS_DIR, 'dataset.json')
+
+
+def _add_spec_arguments(parser, spec_cls):
+    for field in fields(spec_cls):
+        parser.add_argument(f"--{field.name.replace('_', '-')}", type=int, default=field.default)
+
+
+def _spec_from_args(spec_cls, args):
+    return spec_cls(**{field.name: getattr(args, field.name) for field in fields(spec_cls)})
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    seed_parser = commands.add_parser('seed', help='Load the synthetic dataset')
+    _add_spec_arguments(seed_parser, DatasetSpec)
+    seed_parser.add_argument('--workers', type=int, default=4, help='Parallel COPY connections')
+    seed_parser.add_argument('--keep-indexes', action='store_true',
+                             help='Load with indexes and constraints in place')
+
+    peak_parser = commands.add_parser('peak', help='Replay the morning-peak scenario')
+    _add_spec_arguments(peak_parser, PeakSpec)
+    peak_parser.add_argument('--output', help='Result file (default: results/<commit>-peak.json)')
+
+    compare_parser = commands.add_parser('compare', help='Compare two result files')
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('candidate')
+    compare_parser.add_argument('--tolerance', type=float, default=0.10)
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'compare':
+        return 0 if compare_results(args.baseline, args.candidate, args.tolerance) else 1
+
+    from app import create_app, db
+    app = create_app('benchmark')
+
+    if args.command == 'seed':
+        spec = _spec_from_args(DatasetSpec, args)
+        with app.app_context():
+            manifest = seed_database(db.engine, spec, workers=args.workers,
+                                     defer_indexes=not args.keep_indexes)
+            # COPY bypasses the ORM hooks that invalidate cached catalog responses
+            from app.services.catalog_cache import catalog_cache
+            catalog_cache.bump()
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        with open(MANIFEST_PATH, 'w') as fh:
+            json.dump(manifest, fh, indent=2)
+        return 0
+
+    spec = _spec_from_args(PeakSpec, args)
+    if os.path.exists(MANIFEST_PATH):
+        with open(MANIFEST_PATH) as fh:
+            manifest = json.load(fh)
+        spec.population = manifest['counts']['users']
+        with app.app_context():
+            if redate_dataset(db.engine, manifest):
+                # COPY bypasses the hooks that maintain the queue position index
+                from app.services.queue_position_service import queue_positions
+                queue_positions.rebuild()
+                with open(MANIFEST_PATH, 'w') as fh:
+                    json.dump(manifest, fh, indent=2)
+
+    endpoints = MorningPeak(app, spec).run()
+    print_summary(endpoints)
+    path = write_results('peak', vars(spec), endpoints, args.output)
+    print(f"Results written to {path}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,123 @@
+"""
+Benchmark: 500 staff dashboards, live GROUP BY polling vs pushed aggregates
+
+Polling: every dashboard runs the multi-join GROUP BY over appointments,
+queues, offices and services on each refresh. Aggregates: the dashboards
+join over Socket.IO, a batch of appointments changes status, and one
+incremental refresh pushes the deltas; slices are then read from memory.
+
+Usage: python -m benchmarks.bench_dashboard [dashboards] [changes] [workers]
+Run `python -m benchmarks seed` first.
+"""
+
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from flask_jwt_extended import create_access_token
+from sqlalchemy import text
+
+from app import create_app, db, socketio
+from app.services.dashboard_service import dashboard_aggregates
+from benchmarks.report import percentile
+from benchmarks.seed import user_email
+
+LIVE_SQL = """
+    SELECT o.id, o.name, s.id, s.name, a.status, COUNT(*),
+           AVG(a.actual_wait_time),
+           AVG(EXTRACT(EPOCH FROM a.service_end_time - a.service_start_time))
+    FROM appointments a
+    JOIN queues q ON q.id = a.queue_id
+    JOIN offices o ON o.id = q.office_id
+    JOIN services s ON s.id = q.service_id
+    WHERE a.appointment_date = CURRENT_DATE
+    GROUP BY o.id, o.name, s.id, s.name, a.status
+"""
+
+
+def _report(label, samples):
+    samples.sort()
+    print(f"{label:<28} p50 {percentile(samples, 50) * 1000:8.2f} ms   "
+          f"p99 {percentile(samples, 99) * 1000:8.2f} ms")
+
+
+def main():
+    dashboards = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    changes = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    workers = int(sys.argv[3]) if len(sys.argv) > 3 else 32
+
+    app = create_app('benchmark')
+
+    def live_query(_):
+        with app.app_context():
+            started = time.perf_counter()
+            db.session.execute(text(LIVE_SQL)).fetchall()
+            elapsed = time.perf_counter() - started
+            db.session.remove()
+            return elapsed
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        live = list(pool.map(live_query, range(dashboards)))
+    live_total = time.perf_counter() - started
+
+    with app.app_context():
+        staff_id = db.session.execute(text(
+            "UPDATE users SET role = 'staff' WHERE email = :email RETURNING id"
+        ), {'email': user_email(0)}).scalar()
+        db.session.commit()
+        token = create_access_token(identity=str(staff_id))
+
+        started = time.perf_counter()
+        dashboard_aggregates.ensure_started()
+        full_load = time.perf_counter() - started
+
+        clients = []
+        joins = []
+        for _ in range(dashboards):
+            started = time.perf_counter()
+            client = socketio.test_client(app)
+            client.emit('join_dashboard', {'token': token})
+            joins.append(time.perf_counter() - started)
+            client.get_received()
+            clients.append(client)
+
+        db.session.execute(text("""
+            UPDATE appointments SET status = 'completed', actual_wait_time = 12,
+                   service_start_time = CURRENT_TIMESTAMP - interval '9 minutes',
+                   service_end_time = CURRENT_TIMESTAMP
+            WHERE id IN (SELECT id FROM appointments
+                         WHERE appointment_date = CURRENT_DATE AND status IN ('scheduled', 'confirmed')
+                         LIMIT :changes)
+        """), {'changes': changes})
+        db.session.commit()
+
+        started = time.perf_counter()
+        dashboard_aggregates.refresh()
+        push = time.perf_counter() - started
+        delivered = sum(
+            1 for client in clients
+            if any(message['name'] == 'dashboard_delta' for message in client.get_received())
+        )
+
+        reads = []
+        for _ in range(dashboards):
+            started = time.perf_counter()
+            dashboard_aggregates.dashboard()
+            dashboard_aggregates.metrics()
+            reads.append(time.perf_counter() - started)
+
+        for client in clients:
+            client.disconnect()
+
+    print(f"{dashboards} dashboards, {changes} status changes")
+    _report('live GROUP BY per refresh', live)
+    print(f"{'':<28} {dashboards} refreshes in {live_total:.2f}s with {workers} workers")
+    print(f"aggregates initial load      {full_load * 1000:8.2f} ms")
+    _report('join_dashboard + snapshot', joins)
+    print(f"incremental refresh + push   {push * 1000:8.2f} ms, delta delivered to {delivered}/{dashboards}")
+    _report('dashboard + metrics read', reads)
+
+
+if __name__ == '__main__':
+    main()
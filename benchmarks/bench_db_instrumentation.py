@@ -0,0 +1,57 @@
+"""
+Benchmark: overhead of the SQLAlchemy query instrumentation
+
+Runs the same statement loop against an in-memory SQLite engine with
+instrumentation detached, attached but idle (no active request/task),
+and attached inside a unit of work.
+
+Usage: python -m benchmarks.bench_db_instrumentation [iterations]
+"""
+
+import sys
+import time
+
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import Engine
+
+from app.utils.db_instrumentation import (
+    db_instrumentation, _before_cursor_execute
+)
+
+
+def run_queries(engine, iterations: int) -> float:
+    """Execute a trivial statement repeatedly and return the elapsed seconds"""
+    with engine.connect() as conn:
+        started = time.perf_counter()
+        for _ in range(iterations):
+            conn.execute(text('SELECT 1')).scalar()
+        return time.perf_counter() - started
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    engine = create_engine('sqlite:///:memory:')
+
+    run_queries(engine, 1000)  # warm up statement cache
+    baseline = run_queries(engine, iterations)
+
+    event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(Engine, 'after_cursor_execute', db_instrumentation._after_cursor_execute)
+    idle = run_queries(engine, iterations)
+
+    db_instrumentation.start('task', 'benchmark')
+    active = run_queries(engine, iterations)
+    db_instrumentation.finish()
+
+    event.remove(Engine, 'before_cursor_execute', _before_cursor_execute)
+    event.remove(Engine, 'after_cursor_execute', db_instrumentation._after_cursor_execute)
+
+    print(f"{iterations} queries")
+    for label, elapsed in (('disabled', baseline), ('idle', idle), ('active', active)):
+        per_query = elapsed / iterations * 1e6
+        overhead = (elapsed - baseline) / iterations * 1e6
+        print(f"  {label:<10} {per_query:8.2f} us/query  (+{overhead:.2f} us)")
+
+
+if __name__ == '__main__':
+    main()
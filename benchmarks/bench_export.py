@@ -0,0 +1,55 @@
+"""
+Benchmark: streaming export memory ceiling
+
+Streams the appointments export (optionally gzipped) to /dev/null and
+fails if peak RSS grows more than the allowed ceiling over the baseline.
+Seed at least 5M appointments first, e.g.:
+
+    python -m benchmarks seed --users 200000 --offices 48 --days 2 --appointments-per-queue 6600
+
+Usage: python -m benchmarks.bench_export [ceiling_mb] [csv|ndjson] [--gzip]
+"""
+
+import resource
+import sys
+import time
+
+from app import create_app
+from app.services.export_service import ExportService
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+def main():
+    ceiling_mb = float(sys.argv[1]) if len(sys.argv) > 1 and not sys.argv[1].startswith('-') else 64.0
+    fmt = 'ndjson' if 'ndjson' in sys.argv else 'csv'
+    compress = '--gzip' in sys.argv
+
+    app = create_app('benchmark')
+    with app.app_context():
+        baseline = peak_rss_mb()
+        started = time.perf_counter()
+        size = 0
+        rows = 0
+        with open('/dev/null', 'wb') as sink:
+            for chunk in ExportService.stream('appointments', fmt, compress):
+                sink.write(chunk)
+                size += len(chunk)
+                if not compress:
+                    rows += chunk.count(b'\n')
+        elapsed = time.perf_counter() - started
+        growth = peak_rss_mb() - baseline
+
+    print(f"format={fmt} gzip={compress}")
+    if rows:
+        print(f"rows:       {rows - (1 if fmt == 'csv' else 0)} ({rows / elapsed:,.0f} rows/s)")
+    print(f"bytes:      {size:,} in {elapsed:.1f}s")
+    print(f"RSS growth: {growth:.1f} MB (ceiling {ceiling_mb:.0f} MB)")
+    sys.exit(0 if growth <= ceiling_mb else 1)
+
+
+if __name__ == '__main__':
+    main()
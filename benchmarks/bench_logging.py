@@ -0,0 +1,163 @@
+"""
+Benchmark: logging cost under disk pressure
+
+Compares the old synchronous FileHandler with the queue-based JSON
+pipeline while a background thread saturates the log directory with
+fsync'd writes, both per log call and as end-to-end latency of a Flask
+request that logs the way a booking handler does.
+
+Usage: python -m benchmarks.bench_logging [records] [log_dir]
+"""
+
+import logging
+import os
+import queue
+import sys
+import tempfile
+import threading
+import time
+from logging.handlers import RotatingFileHandler
+
+from flask import Flask, current_app
+
+from app.utils.logging_config import (
+    DroppingQueueHandler, JSONFormatter, NativeThreadQueueListener, configure_logging
+)
+from benchmarks.report import percentile
+
+# Log lines written by one simulated booking request
+LINES_PER_REQUEST = 4
+
+
+def disk_pressure(directory: str, stop: threading.Event):
+    """Keep the disk busy with large synchronous writes"""
+    chunk = os.urandom(4 * 1024 * 1024)
+    path = os.path.join(directory, 'pressure.bin')
+    while not stop.is_set():
+        with open(path, 'wb') as fh:
+            for _ in range(8):
+                fh.write(chunk)
+                fh.flush()
+                os.fsync(fh.fileno())
+    os.remove(path)
+
+
+def measure(logger: logging.Logger, records: int):
+    samples = []
+    for i in range(records):
+        started = time.perf_counter()
+        logger.info('Appointment %s booked for queue %s', i, i % 64)
+        samples.append(time.perf_counter() - started)
+    return sorted(samples)
+
+
+def request_app(log_dir: str) -> Flask:
+    """Minimal app whose one route logs like the booking endpoint"""
+    app = Flask('bench_logging')
+    app.config.update(
+        LOG_DIR=log_dir, LOG_FILE='request.log', LOG_MAX_BYTES=50 * 1024 * 1024, LOG_BACKUP_COUNT=2,
+        LOG_QUEUE_SIZE=10000, LOG_INFO_SAMPLE_RATE=1.0
+    )
+
+    @app.route('/book')
+    def book():
+        for step in range(LINES_PER_REQUEST):
+            current_app.logger.info('Booking step %s for queue %s', step, step % 64)
+        return {'status': 'booked'}
+
+    return app
+
+
+def measure_requests(app: Flask, requests: int):
+    client = app.test_client()
+    samples = []
+    for _ in range(requests):
+        started = time.perf_counter()
+        client.get('/book')
+        samples.append(time.perf_counter() - started)
+    return sorted(samples)
+
+
+def request_latency(log_dir: str, requests: int):
+    """Request latency with a synchronous FileHandler vs configure_logging's pipeline"""
+    root = logging.getLogger()
+
+    sync_app = request_app(log_dir)
+    file_handler = logging.FileHandler(os.path.join(log_dir, 'request-sync.log'))
+    file_handler.setFormatter(logging.Formatter(
+        '%(asctime)s %(levelname)s: %(message)s [in %(pathname)s:%(lineno)d]'
+    ))
+    root.addHandler(file_handler)
+    root.setLevel(logging.INFO)
+    sync_app.logger.setLevel(logging.INFO)
+    sync_samples = measure_requests(sync_app, requests)
+    root.removeHandler(file_handler)
+    file_handler.close()
+
+    async_app = request_app(log_dir)
+    listener = configure_logging(async_app)
+    async_samples = measure_requests(async_app, requests)
+    listener.stop()
+    for handler in list(root.handlers):
+        if isinstance(handler, DroppingQueueHandler):
+            root.removeHandler(handler)
+    return sync_samples, async_samples
+
+
+def _print(label, samples):
+    print(
+        f"  {label:<18} p50 {percentile(samples, 50) * 1e6:8.1f} us  "
+        f"p99 {percentile(samples, 99) * 1e6:8.1f} us  "
+        f"max {samples[-1] * 1e6:10.1f} us"
+    )
+
+
+def main():
+    records = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    log_dir = sys.argv[2] if len(sys.argv) > 2 else tempfile.mkdtemp(prefix='guvnl-logbench-')
+
+    stop = threading.Event()
+    pressure = threading.Thread(target=disk_pressure, args=(log_dir, stop), daemon=True)
+    pressure.start()
+
+    try:
+        sync_logger = logging.getLogger('bench.sync')
+        sync_logger.propagate = False
+        file_handler = logging.FileHandler(os.path.join(log_dir, 'sync.log'))
+        file_handler.setFormatter(logging.Formatter(
+            '%(asctime)s %(levelname)s: %(message)s [in %(pathname)s:%(lineno)d]'
+        ))
+        sync_logger.addHandler(file_handler)
+        sync_logger.setLevel(logging.INFO)
+        sync_samples = measure(sync_logger, records)
+        file_handler.close()
+
+        async_logger = logging.getLogger('bench.async')
+        async_logger.propagate = False
+        rotating = RotatingFileHandler(os.path.join(log_dir, 'async.log'),
+                                       maxBytes=50 * 1024 * 1024, backupCount=2)
+        rotating.setFormatter(JSONFormatter())
+        log_queue = queue.Queue(maxsize=10000)
+        async_logger.addHandler(DroppingQueueHandler(log_queue, queue.Full))
+        async_logger.setLevel(logging.INFO)
+        listener = NativeThreadQueueListener(log_queue, rotating, threading_module=threading)
+        listener.start()
+        async_samples = measure(async_logger, records)
+        listener.stop()
+        rotating.close()
+
+        sync_requests, async_requests = request_latency(log_dir, max(records // LINES_PER_REQUEST, 100))
+    finally:
+        stop.set()
+        pressure.join()
+
+    print(f"{records} log calls under disk pressure ({log_dir})")
+    _print('FileHandler', sync_samples)
+    _print('QueueHandler+JSON', async_samples)
+    print(f"{len(sync_requests)} requests logging {LINES_PER_REQUEST} lines each")
+    _print('FileHandler', sync_requests)
+    _print('QueueHandler+JSON', async_requests)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+"""
+Benchmark: notification deliveries per second by worker pool
+
+Starts a fake SMS provider (a local HTTP server that answers after a
+fixed latency, like Twilio) in a subprocess, then delivers N messages
+with 2 concurrent slots (the old prefork --concurrency=2) or with an
+eventlet green pool (the notification worker profile).
+
+Usage: python -m benchmarks.bench_notifications [messages] [latency_ms] [--pool prefork|eventlet] [--concurrency N]
+"""
+
+import subprocess
+import sys
+import time
+
+PORT = 8765
+
+
+def serve(latency: float):
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class FakeProvider(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get('Content-Length', 0)))
+            time.sleep(latency)
+            body = b'{"sid": "SMfake", "status": "queued"}'
+            self.send_response(201)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    ThreadingHTTPServer.daemon_threads = True
+    ThreadingHTTPServer.request_queue_size = 1024
+    ThreadingHTTPServer(('127.0.0.1', PORT), FakeProvider).serve_forever()
+
+
+def _option(name, default):
+    if name in sys.argv:
+        return sys.argv[sys.argv.index(name) + 1]
+    return default
+
+
+def main():
+    if '--serve' in sys.argv:
+        serve(float(sys.argv[sys.argv.index('--serve') + 1]))
+        return
+
+    positional = [a for i, a in enumerate(sys.argv[1:], 1)
+                  if not a.startswith('--') and not sys.argv[i - 1].startswith('--')]
+    messages = int(positional[0]) if positional else 2000
+    latency_ms = float(positional[1]) if len(positional) > 1 else 250
+    pool_type = _option('--pool', 'eventlet')
+    concurrency = int(_option('--concurrency', 2 if pool_type == 'prefork' else 200))
+
+    server = subprocess.Popen([sys.executable, '-m', 'benchmarks.bench_notifications',
+                               '--serve', str(latency_ms / 1000.0)])
+    time.sleep(1)
+    try:
+        if pool_type == 'eventlet':
+            import eventlet
+            eventlet.monkey_patch()
+            import requests
+            session = requests.Session()
+            session.mount('http://', requests.adapters.HTTPAdapter(pool_maxsize=concurrency))
+
+            def send(i):
+                return session.post(f'http://127.0.0.1:{PORT}/Messages.json',
+                                    data={'To': f'+9170000{i:05d}', 'Body': 'Reminder'}, timeout=15).ok
+
+            pool = eventlet.GreenPool(concurrency)
+            started = time.perf_counter()
+            ok = sum(pool.imap(send, range(messages)))
+        else:
+            from concurrent.futures import ThreadPoolExecutor
+            import requests
+
+            def send(i):
+                return requests.post(f'http://127.0.0.1:{PORT}/Messages.json',
+                                     data={'To': f'+9170000{i:05d}', 'Body': 'Reminder'}, timeout=15).ok
+
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                ok = sum(executor.map(send, range(messages)))
+        elapsed = time.perf_counter() - started
+    finally:
+        server.terminate()
+
+    print(f"{pool_type} x{concurrency}: {ok}/{messages} sent in {elapsed:.1f}s "
+          f"= {messages / elapsed:,.1f} msg/s (provider latency {latency_ms:.0f} ms)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,239 @@
+"""
+Benchmark: batched FCM push delivery against a local fake FCM server
+
+The fake server (a subprocess) issues OAuth tokens and answers the HTTP v1
+messages:send endpoint after a fixed latency. Tokens starting with `bad-`
+are UNREGISTERED and tokens starting with `flaky-` return UNAVAILABLE on
+their first attempt. The run checks that every token gets the right outcome,
+that retries succeed, and that connections and the access token are reused.
+
+With --task it instead runs the send_push_notification Celery task eagerly
+against the benchmark database and checks the statuses it writes back: bad
+tokens failed and pruned, flaky tokens sent after a retry, and no resend
+when the task is delivered again.
+
+Usage: python -m benchmarks.bench_push [messages] [latency_ms] [--no-keepalive | --task]
+"""
+
+import json
+import subprocess
+import sys
+import time
+
+PORT = 8766
+BATCH_SIZE = 500
+
+
+def serve(latency: float):
+    import threading
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    stats = {'connections': 0, 'tokens_issued': 0, 'sends': 0}
+    seen_flaky = set()
+    lock = threading.Lock()
+
+    class FakeFCM(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def setup(self):
+            super().setup()
+            with lock:
+                stats['connections'] += 1
+
+        def _reply(self, status, payload):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            with lock:
+                self._reply(200, dict(stats))
+
+        def do_POST(self):
+            raw = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+            if self.path == '/token':
+                with lock:
+                    stats['tokens_issued'] += 1
+                self._reply(200, {'access_token': f"fake-{stats['tokens_issued']}", 'expires_in': 3600})
+                return
+
+            if not self.headers.get('Authorization', '').startswith('Bearer fake-'):
+                self._reply(401, {'error': {'code': 401, 'status': 'UNAUTHENTICATED'}})
+                return
+            token = json.loads(raw)['message']['token']
+            time.sleep(latency)
+            with lock:
+                stats['sends'] += 1
+                first_flaky = token.startswith('flaky-') and token not in seen_flaky
+                seen_flaky.add(token)
+            if token.startswith('bad-'):
+                self._reply(404, {'error': {'code': 404, 'status': 'NOT_FOUND', 'details': [
+                    {'@type': 'type.googleapis.com/google.firebase.fcm.v1.FcmError', 'errorCode': 'UNREGISTERED'}
+                ]}})
+            elif first_flaky:
+                self._reply(503, {'error': {'code': 503, 'status': 'UNAVAILABLE', 'details': [
+                    {'@type': 'type.googleapis.com/google.firebase.fcm.v1.FcmError', 'errorCode': 'UNAVAILABLE'}
+                ]}})
+            else:
+                self._reply(200, {'name': f'projects/bench/messages/{stats["sends"]}'})
+
+        def log_message(self, *args):
+            pass
+
+    ThreadingHTTPServer.daemon_threads = True
+    ThreadingHTTPServer.request_queue_size = 1024
+    ThreadingHTTPServer(('127.0.0.1', PORT), FakeFCM).serve_forever()
+
+
+def _private_key() -> str:
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import rsa
+
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    return key.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    ).decode()
+
+
+def _token(i: int) -> str:
+    if i % 50 == 7:
+        return f'bad-{i}'
+    if i % 50 == 13:
+        return f'flaky-{i}'
+    return f'device-{i}'
+
+
+def task_check(base_url: str, messages: int) -> int:
+    """Run the push task against the benchmark database; returns the number of wrong rows"""
+    import requests
+    from sqlalchemy import text
+
+    from app import create_app, db
+    from app.services import push_service
+    from app.services.notification_service import send_push_notification
+    from benchmarks.seed import user_email
+
+    app = create_app('benchmark')
+    app.config.update(
+        FIREBASE_PROJECT_ID='bench-task',
+        FIREBASE_CLIENT_EMAIL='bench@bench.iam.gserviceaccount.com',
+        FIREBASE_PRIVATE_KEY=_private_key(),
+        FCM_BASE_URL=base_url,
+        FCM_TOKEN_URL=f'{base_url}/token',
+    )
+    push_service._fcm_clients.pop('bench-task', None)
+
+    with app.app_context():
+        user_id = db.session.execute(text("SELECT id FROM users WHERE email = :email"),
+                                     {'email': user_email(0)}).scalar()
+        tokens = {}
+        for i in range(messages):
+            token = f'{_token(i)}-task-{time.time_ns()}'
+            push_service.register_device_token(user_id, token, 'android')
+            notification_id = db.session.execute(text(
+                "INSERT INTO notifications (user_id, type, recipient, subject, message) "
+                "VALUES (:user_id, 'push', :token, 'Queue update', :message) RETURNING id"
+            ), {'user_id': user_id, 'token': token, 'message': f'Your position is {i % 40 + 1}'}).scalar()
+            tokens[str(notification_id)] = token
+        db.session.commit()
+        ids = list(tokens)
+
+        try:
+            started = time.perf_counter()
+            # Eager retries run immediately, ignoring the countdown
+            send_push_notification.apply(args=[ids])
+            elapsed = time.perf_counter() - started
+            sends = requests.get(base_url).json()['sends']
+            send_push_notification.apply(args=[ids])
+            resent = requests.get(base_url).json()['sends'] - sends
+
+            rows = db.session.execute(text(
+                "SELECT n.id, n.status, n.retry_count, d.id IS NOT NULL AS registered "
+                "FROM notifications n LEFT JOIN device_tokens d ON d.token = n.recipient "
+                "WHERE n.id = ANY(CAST(:ids AS uuid[]))"
+            ), {'ids': ids}).fetchall()
+            wrong = 0
+            for row in rows:
+                token = tokens[str(row.id)]
+                if token.startswith('bad-'):
+                    wrong += row.status != 'failed' or row.registered
+                elif token.startswith('flaky-'):
+                    wrong += row.status != 'sent' or row.retry_count != 1
+                else:
+                    wrong += row.status != 'sent' or row.retry_count != 0
+            wrong += messages - len(rows)
+        finally:
+            db.session.rollback()
+            db.session.execute(text("DELETE FROM notifications WHERE id = ANY(CAST(:ids AS uuid[]))"), {'ids': ids})
+            db.session.execute(text("DELETE FROM device_tokens WHERE token = ANY(:tokens)"),
+                               {'tokens': list(tokens.values())})
+            db.session.commit()
+
+    print(f"send_push_notification: {messages} notifications in {elapsed:.2f}s")
+    print(f"  wrong statuses {wrong}, sends on redelivery {resent}")
+    return wrong + resent
+
+
+def main():
+    if '--serve' in sys.argv:
+        serve(float(sys.argv[sys.argv.index('--serve') + 1]))
+        return
+
+    import requests
+    from app.services.push_service import FCMClient, PushMessage, SENT, INVALID, RETRY
+
+    args = [a for a in sys.argv[1:] if not a.startswith('--')]
+    # The task sends one FCM batch per call
+    messages = int(args[0]) if args else (BATCH_SIZE if '--task' in sys.argv else 10_000)
+    latency_ms = float(args[1]) if len(args) > 1 else 50
+
+    server = subprocess.Popen([sys.executable, '-m', 'benchmarks.bench_push', '--serve', str(latency_ms / 1000.0)])
+    time.sleep(1)
+    try:
+        base_url = f'http://127.0.0.1:{PORT}'
+        if '--task' in sys.argv:
+            return 1 if task_check(base_url, messages) else 0
+
+        client = FCMClient('bench', 'bench@bench.iam.gserviceaccount.com', _private_key(),
+                           base_url=base_url, token_url=f'{base_url}/token', max_connections=50)
+        if '--no-keepalive' in sys.argv:
+            client.session.headers['Connection'] = 'close'
+
+        pending = [PushMessage(str(i), _token(i), 'Queue update', f'Your position is {i % 40 + 1}')
+                   for i in range(messages)]
+        outcomes = {}
+        attempts = 0
+        started = time.perf_counter()
+        while pending and attempts < 3:
+            attempts += 1
+            retry = []
+            for start in range(0, len(pending), BATCH_SIZE):
+                batch = pending[start:start + BATCH_SIZE]
+                for message, result in zip(batch, client.send_batch(batch)):
+                    outcomes[result.key] = result.outcome
+                    if result.outcome == RETRY:
+                        retry.append(message)
+            pending = retry
+        elapsed = time.perf_counter() - started
+        stats = requests.get(base_url).json()
+    finally:
+        server.terminate()
+
+    expected = {str(i): INVALID if _token(i).startswith('bad-') else SENT for i in range(messages)}
+    wrong = sum(1 for key, outcome in expected.items() if outcomes.get(key) != outcome)
+    sent = sum(1 for outcome in outcomes.values() if outcome == SENT)
+    invalid = sum(1 for outcome in outcomes.values() if outcome == INVALID)
+
+    print(f"{messages} messages in {elapsed:.2f}s = {messages / elapsed:,.0f} msg/s "
+          f"(fake FCM latency {latency_ms:.0f} ms, {attempts} passes)")
+    print(f"  sent {sent}, invalid tokens {invalid}, wrong outcomes {wrong}")
+    print(f"  HTTP connections opened {stats['connections']}, access tokens fetched {stats['tokens_issued']}, "
+          f"send calls {stats['sends']}")
+    return 1 if wrong else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,89 @@
+"""
+Benchmark: serializing 10k appointments
+
+Compares hand-built dicts with .isoformat() through the stdlib json
+encoder (what routes did before) with declared serializers encoded by
+orjson.
+
+Usage: python -m benchmarks.bench_serialization [rows]
+"""
+
+import json
+import sys
+import time
+import uuid
+from datetime import date, datetime, time as dt_time, timedelta
+from types import SimpleNamespace
+
+import orjson
+
+from app.utils.serializers import APPOINTMENT
+
+
+def make_appointments(count: int):
+    now = datetime(2024, 1, 15, 9, 0, 0)
+    return [
+        SimpleNamespace(
+            id=uuid.uuid4(),
+            user_id=uuid.uuid4(),
+            queue_id=uuid.uuid4(),
+            token_number=i + 1,
+            status='confirmed',
+            appointment_date=date(2024, 1, 15),
+            appointment_time=dt_time(9 + i % 8, (i * 7) % 60),
+            estimated_wait_time=15 + i % 60,
+            actual_wait_time=None,
+            service_start_time=now + timedelta(minutes=i),
+            service_end_time=None,
+            notes='Need help with new connection',
+            created_at=now - timedelta(days=1, seconds=i),
+            updated_at=now,
+        )
+        for i in range(count)
+    ]
+
+
+def hand_built(appointments):
+    return json.dumps({'appointments': [{
+        'id': str(a.id),
+        'user_id': str(a.user_id),
+        'queue_id': str(a.queue_id),
+        'token_number': a.token_number,
+        'status': a.status,
+        'appointment_date': a.appointment_date.isoformat(),
+        'appointment_time': a.appointment_time.isoformat() if a.appointment_time else None,
+        'estimated_wait_time': a.estimated_wait_time,
+        'actual_wait_time': a.actual_wait_time,
+        'service_start_time': a.service_start_time.isoformat() if a.service_start_time else None,
+        'service_end_time': a.service_end_time.isoformat() if a.service_end_time else None,
+        'notes': a.notes,
+        'created_at': a.created_at.isoformat(),
+        'updated_at': a.updated_at.isoformat(),
+    } for a in appointments]}).encode()
+
+
+def declared(appointments):
+    return orjson.dumps({'appointments': APPOINTMENT.dump_many(appointments)})
+
+
+def best_of(fn, arg, repeat=5):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        body = fn(arg)
+        timings.append(time.perf_counter() - started)
+    return min(timings), len(body)
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    appointments = make_appointments(rows)
+
+    print(f"Serializing {rows} appointments (best of 5)")
+    for label, fn in (('hand-built + json', hand_built), ('serializer + orjson', declared)):
+        elapsed, size = best_of(fn, appointments)
+        print(f"  {label:<30} {elapsed * 1000:8.2f} ms  {size / 1024:8.1f} KiB")
+
+
+if __name__ == '__main__':
+    main()
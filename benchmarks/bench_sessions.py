@@ -0,0 +1,98 @@
+"""
+Benchmark: per-request cost of session checks
+
+Compares sliding the idle timeout in Redis (one pipelined round trip) with
+doing the same in PostgreSQL (an UPDATE and commit on user_sessions), times
+an authenticated request with and without a session-bound token, and times
+the batched write-back of the accumulated activity.
+
+Usage: python -m benchmarks.bench_sessions [requests] [sessions]
+Run `python -m benchmarks seed` first.
+"""
+
+import sys
+import time
+
+from flask_jwt_extended import create_access_token, create_refresh_token
+from sqlalchemy import text
+
+from app import create_app, db
+from app.services.session_service import session_store
+from benchmarks.report import percentile
+from benchmarks.seed import user_email
+
+
+def _timed(fn, n):
+    samples = []
+    for _ in range(n):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    samples.sort()
+    return samples
+
+
+def _report(label, samples):
+    print(f"{label:<34} p50 {percentile(samples, 50) * 1e6:9.1f} us   "
+          f"p99 {percentile(samples, 99) * 1e6:9.1f} us")
+
+
+def main():
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    sessions = int(sys.argv[2]) if len(sys.argv) > 2 else 10_000
+
+    app = create_app('benchmark')
+    with app.test_request_context():
+        user_id = str(db.session.execute(
+            text("SELECT id FROM users WHERE email = :email"), {'email': user_email(0)}
+        ).scalar())
+
+        session_id = session_store.new_session_id()
+        refresh_token = create_refresh_token(identity=user_id, additional_claims={'sid': session_id})
+        session_store.create(session_id, user_id, refresh_token)
+        session_store.flush()
+
+        redis_touch = _timed(lambda: session_store.touch(session_id), requests)
+
+        def postgres_touch():
+            db.session.execute(text(
+                "UPDATE user_sessions SET expires_at = CURRENT_TIMESTAMP + make_interval(mins => 30) "
+                "WHERE id = :id"
+            ), {'id': session_id})
+            db.session.commit()
+        postgres = _timed(postgres_touch, max(requests // 10, 100))
+
+        with_session = create_access_token(identity=user_id, additional_claims={'sid': session_id})
+        without_session = create_access_token(identity=user_id)
+        client = app.test_client()
+
+        def get(token):
+            return lambda: client.get('/api/auth/verify-token', headers={'Authorization': f'Bearer {token}'})
+        request_plain = _timed(get(without_session), max(requests // 10, 100))
+        request_session = _timed(get(with_session), max(requests // 10, 100))
+
+        session_ids = []
+        for _ in range(sessions):
+            sid = session_store.new_session_id()
+            session_store.create(sid, user_id, refresh_token)
+            session_ids.append(sid)
+        for sid in session_ids:
+            session_store.touch(sid)
+        started = time.perf_counter()
+        counts = session_store.flush()
+        flush_seconds = time.perf_counter() - started
+
+        session_store.end_all(user_id)
+        session_store.flush()
+
+    print(f"{requests} requests, {sessions} sessions written back")
+    _report('Redis touch (EXPIRE + HSET)', redis_touch)
+    _report('PostgreSQL UPDATE + commit', postgres)
+    _report('verify-token, token without sid', request_plain)
+    _report('verify-token, session-bound token', request_session)
+    print(f"write-back of {counts['created']} created / {counts['seen']} seen sessions: "
+          f"{flush_seconds * 1000:.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""
+Benchmark: settings read cost and invalidation propagation delay
+
+Compares reading a setting from the snapshot with querying the settings
+table, then flips `notification_advance_minutes` repeatedly and measures
+how long the pub/sub invalidation takes to reach the snapshot.
+
+Usage: python -m benchmarks.bench_settings [reads] [updates]
+"""
+
+import sys
+import time
+
+from sqlalchemy import text
+
+from app import create_app, db
+from app.services.settings_service import settings_service
+from benchmarks.report import percentile
+
+
+def main():
+    reads = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    updates = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+
+    app = create_app('benchmark')
+    with app.app_context():
+        settings_service.get()
+
+        started = time.perf_counter()
+        for _ in range(reads):
+            settings_service.get().max_advance_booking_days
+        snapshot_ns = (time.perf_counter() - started) / reads * 1e9
+
+        queries = max(reads // 1000, 100)
+        started = time.perf_counter()
+        for _ in range(queries):
+            db.session.execute(text(
+                "SELECT value FROM settings WHERE key = 'max_advance_booking_days'"
+            )).scalar()
+        query_ns = (time.perf_counter() - started) / queries * 1e9
+
+        original = settings_service.get().notification_advance_minutes
+        delays = []
+        for i in range(updates):
+            value = original + 1 + (i % 2)
+            # Change the row directly so only the pub/sub path can refresh the snapshot
+            db.session.execute(text(
+                "UPDATE settings SET value = :value WHERE key = 'notification_advance_minutes'"
+            ), {'value': str(value)})
+            db.session.commit()
+            version = settings_service.get().version
+            started = time.perf_counter()
+            app.redis.publish('settings:invalidate', '{"published_at": %f}' % time.time())
+            while settings_service.get().version == version:
+                time.sleep(0.0005)
+            delays.append(time.perf_counter() - started)
+        settings_service.update('notification_advance_minutes', original)
+
+    delays.sort()
+    print(f"snapshot read: {snapshot_ns:10.1f} ns")
+    print(f"table query:   {query_ns:10.1f} ns")
+    print(f"propagation over {updates} updates: p50 {percentile(delays, 50) * 1000:.2f} ms, "
+          f"p99 {percentile(delays, 99) * 1000:.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,156 @@
+"""
+Benchmark: worker startup time
+
+1. Import time of wsgi.py (app factory, extensions, blueprints) from
+   `python -X importtime`, with the slowest modules and a check that the
+   lazily imported provider SDKs stay out of it.
+2. Time from worker start to its first response, three ways:
+   no-preload    the worker imports and builds the app itself
+   preload       the app is built before fork; the forked worker serves
+   preload+warm  as preload, with app.utils.warmup.warm_up before fork
+   Each run is a new process so nothing is cached between runs. Forked
+   workers also check that a record they log reaches the log file.
+
+Usage: python -m benchmarks.bench_startup [runs] [path]
+Run `python -m benchmarks seed` first; path defaults to /api/offices.
+"""
+
+import json
+import logging
+import os
+import subprocess
+import sys
+import time
+
+LAZY_SDKS = ('twilio',)
+MODES = ('no-preload', 'preload', 'preload+warm')
+
+
+def _env():
+    return {**os.environ, 'FLASK_ENV': 'benchmark'}
+
+
+def import_times():
+    """(total seconds, [(cumulative seconds, module)]) for importing wsgi"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import wsgi'],
+        env=_env(), capture_output=True, text=True, check=True
+    )
+    modules, total = [], 0.0
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        seconds = int(cumulative) / 1e6
+        # Nested imports are indented and already counted in their parent's cumulative time
+        if not name[1:].startswith(' '):
+            total += seconds
+        modules.append((seconds, name.strip()))
+    return total, sorted(modules, reverse=True)
+
+
+def _request(app, path):
+    client = app.test_client()
+    started = time.perf_counter()
+    response = client.get(path)
+    first = time.perf_counter() - started
+    started = time.perf_counter()
+    client.get(path)
+    second = time.perf_counter() - started
+    return response.status_code, first, second
+
+
+def _log_reaches_file(app) -> bool:
+    """Log a marker and flush the listener; False if the record was lost"""
+    listener = getattr(app, 'log_listener', None)
+    if listener is None:
+        return True
+    marker = f'bench-startup-{os.getpid()}-{time.time_ns()}'
+    logging.getLogger(__name__).warning(marker)
+    listener.stop()
+    with open(os.path.join(app.config['LOG_DIR'], app.config['LOG_FILE'])) as log_file:
+        return marker in log_file.read()
+
+
+def child(mode: str, path: str):
+    """One fresh worker; prints its timings as JSON"""
+    started = time.perf_counter()
+    from wsgi import app
+    build = time.perf_counter() - started
+    warm = 0.0
+    logged = True
+
+    if mode == 'no-preload':
+        status, first, second = _request(app, path)
+        # The worker builds the app itself before it can answer
+        to_first = build + first
+    else:
+        from app.utils.warmup import warm_up, reset_after_fork
+        if mode == 'preload+warm':
+            started = time.perf_counter()
+            warm_up(app)
+            warm = time.perf_counter() - started
+        read_end, write_end = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(read_end)
+            forked = time.perf_counter()
+            reset_after_fork(app)
+            status, first, second = _request(app, path)
+            to_first = time.perf_counter() - forked - second
+            os.write(write_end, json.dumps([status, to_first, first, second, _log_reaches_file(app)]).encode())
+            os._exit(0)
+        os.close(write_end)
+        os.waitpid(pid, 0)
+        status, to_first, first, second, logged = json.loads(os.read(read_end, 4096))
+
+    print(json.dumps({'status': status, 'build': build, 'warm': warm, 'to_first': to_first,
+                      'first': first, 'second': second, 'logged': logged}))
+
+
+def _median(values):
+    values = sorted(values)
+    return values[len(values) // 2]
+
+
+def main():
+    if '--child' in sys.argv:
+        index = sys.argv.index('--child')
+        child(sys.argv[index + 1], sys.argv[index + 2])
+        return 0
+
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    path = sys.argv[2] if len(sys.argv) > 2 else '/api/offices'
+
+    total, modules = import_times()
+    print(f"import wsgi: {total * 1000:.0f} ms")
+    for seconds, name in modules[:15]:
+        print(f"  {seconds * 1000:8.1f} ms  {name}")
+    loaded = [sdk for sdk in LAZY_SDKS if any(name == sdk or name.startswith(f'{sdk}.') for _, name in modules)]
+    print(f"  provider SDKs imported at startup: {', '.join(loaded) or 'none'}")
+
+    failed = False
+    print(f"\ntime to first request for {path} (median of {runs} fresh processes)")
+    print(f"{'mode':<14} {'build':>9} {'warm-up':>9} {'worker to 1st':>14} {'1st request':>12} {'2nd request':>12}")
+    for mode in MODES:
+        samples = []
+        for _ in range(runs):
+            result = subprocess.run(
+                [sys.executable, '-m', 'benchmarks.bench_startup', '--child', mode, path],
+                env=_env(), capture_output=True, text=True, check=True
+            )
+            samples.append(json.loads(result.stdout.strip().splitlines()[-1]))
+        if any(sample['status'] != 200 for sample in samples):
+            print(f"{mode}: {path} returned {samples[-1]['status']}")
+        if not all(sample['logged'] for sample in samples):
+            print(f"{mode}: records logged by the forked worker never reached the log file")
+            failed = True
+        row = {key: _median([sample[key] for sample in samples]) * 1000
+               for key in ('build', 'warm', 'to_first', 'first', 'second')}
+        print(f"{mode:<14} {row['build']:7.0f}ms {row['warm']:7.0f}ms {row['to_first']:12.0f}ms "
+              f"{row['first']:10.1f}ms {row['second']:10.1f}ms")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,124 @@
+"""
+Latency recording, percentile reports and regression comparison
+"""
+
+import json
+import math
+import os
+import subprocess
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List, Optional
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), 'results')
+
+
+class LatencyRecorder:
+    """Thread-safe collection of per-endpoint latencies"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._latencies: Dict[str, List[float]] = defaultdict(list)
+        self._errors: Dict[str, int] = defaultdict(int)
+        self._started = time.perf_counter()
+        self._finished: Optional[float] = None
+
+    def record(self, endpoint: str, seconds: float, ok: bool = True):
+        with self._lock:
+            self._latencies[endpoint].append(seconds)
+            if not ok:
+                self._errors[endpoint] += 1
+
+    def stop(self):
+        self._finished = time.perf_counter()
+
+    def summary(self) -> Dict[str, Dict]:
+        """Throughput and latency percentiles for each endpoint"""
+        elapsed = (self._finished or time.perf_counter()) - self._started
+        endpoints = {}
+        with self._lock:
+            for endpoint, samples in sorted(self._latencies.items()):
+                ordered = sorted(samples)
+                endpoints[endpoint] = {
+                    'count': len(ordered),
+                    'errors': self._errors.get(endpoint, 0),
+                    'throughput_rps': round(len(ordered) / elapsed, 2) if elapsed else 0.0,
+                    'p50_ms': round(percentile(ordered, 50) * 1000, 3),
+                    'p95_ms': round(percentile(ordered, 95) * 1000, 3),
+                    'p99_ms': round(percentile(ordered, 99) * 1000, 3),
+                    'max_ms': round(ordered[-1] * 1000, 3),
+                }
+        return endpoints
+
+
+def percentile(ordered: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted sample"""
+    if not ordered:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100.0 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def current_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def write_results(scenario: str, params: Dict, endpoints: Dict, path: Optional[str] = None) -> str:
+    """Store a run as JSON, by default under benchmarks/results/<commit>-<scenario>.json"""
+    commit = current_commit()
+    if path is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        path = os.path.join(RESULTS_DIR, f'{commit}-{scenario}.json')
+
+    with open(path, 'w') as fh:
+        json.dump({
+            'scenario': scenario,
+            'commit': commit,
+            'timestamp': datetime.utcnow().isoformat(),
+            'params': params,
+            'endpoints': endpoints,
+        }, fh, indent=2, sort_keys=True)
+    return path
+
+
+def print_summary(endpoints: Dict):
+    print(f"{'endpoint':<36} {'count':>8} {'err':>5} {'rps':>9} {'p50':>9} {'p95':>9} {'p99':>9}")
+    for endpoint, stats in endpoints.items():
+        print(
+            f"{endpoint:<36} {stats['count']:>8} {stats['errors']:>5} "
+            f"{stats['throughput_rps']:>9.1f} {stats['p50_ms']:>9.2f} "
+            f"{stats['p95_ms']:>9.2f} {stats['p99_ms']:>9.2f}"
+        )
+
+
+def compare_results(baseline_path: str, candidate_path: str, tolerance: float = 0.10) -> bool:
+    """Print per-endpoint deltas; return False if any p95/p99 regressed beyond tolerance"""
+    with open(baseline_path) as fh:
+        baseline = json.load(fh)
+    with open(candidate_path) as fh:
+        candidate = json.load(fh)
+
+    print(f"baseline {baseline['commit']} vs candidate {candidate['commit']}")
+    ok = True
+    for endpoint, stats in candidate['endpoints'].items():
+        before = baseline['endpoints'].get(endpoint)
+        if not before:
+            print(f"  {endpoint}: new endpoint")
+            continue
+        for key in ('p50_ms', 'p95_ms', 'p99_ms', 'throughput_rps'):
+            old, new = before[key], stats[key]
+            change = (new - old) / old if old else 0.0
+            # Latency regresses upwards, throughput downwards
+            regressed = change > tolerance if key != 'throughput_rps' else change < -tolerance
+            if regressed and key != 'p50_ms':
+                ok = False
+            marker = ' REGRESSION' if regressed else ''
+            print(f"  {endpoint:<36} {key:<15} {old:>10.2f} -> {new:>10.2f} ({change:+.1%}){marker}")
+    return ok
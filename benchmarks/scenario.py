@@ -0,0 +1,145 @@
+"""
+Morning-peak scenario for the booking day
+
+Replays, in order: a login storm, bookings, status polls with Socket.IO
+subscribers connected, and a reminder fan-out, against the Flask app using
+its test clients and the local PostgreSQL/Redis from docker-compose.yml.
+"""
+
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import date
+from typing import Dict, List, Tuple
+
+from sqlalchemy import text
+
+from app import db, socketio, celery
+from benchmarks.report import LatencyRecorder
+from benchmarks.seed import BENCH_PASSWORD, user_email
+
+
+@dataclass
+class PeakSpec:
+    """Volume of each phase of the morning peak"""
+    seed: int = 7
+    workers: int = 32
+    logins: int = 5000
+    bookings: int = 3000
+    status_polls: int = 20000
+    subscribers: int = 500
+    population: int = 1_000_000
+
+
+class MorningPeak:
+    """Drives the phases of the peak and records per-endpoint latency"""
+
+    def __init__(self, app, spec: PeakSpec):
+        self.app = app
+        self.spec = spec
+        self.rng = random.Random(spec.seed)
+        self.recorder = LatencyRecorder()
+        self.tokens: List[str] = []
+        self.appointment_ids: List[Tuple[str, str]] = []
+        self.queues: List[Tuple[str, str, str]] = []
+
+    def _call(self, name: str, method: str, url: str, token: str = None, json: Dict = None):
+        headers = {'Authorization': f'Bearer {token}'} if token else {}
+        client = self.app.test_client()
+        started = time.perf_counter()
+        response = client.open(url, method=method, json=json, headers=headers)
+        self.recorder.record(name, time.perf_counter() - started, response.status_code < 400)
+        return response
+
+    def _fan_out(self, fn, items):
+        with ThreadPoolExecutor(max_workers=self.spec.workers) as pool:
+            return list(pool.map(fn, items))
+
+    def load_queues(self):
+        with self.app.app_context():
+            rows = db.session.execute(text(
+                "SELECT id, office_id, service_id FROM queues WHERE queue_date = :today"
+            ), {'today': date.today()}).fetchall()
+        self.queues = [(str(r.id), str(r.office_id), str(r.service_id)) for r in rows]
+
+    def login_storm(self):
+        users = self.rng.sample(range(self.spec.population), self.spec.logins)
+
+        def login(index):
+            response = self._call('POST /api/auth/login', 'POST', '/api/auth/login', json={
+                'identifier': user_email(index), 'password': BENCH_PASSWORD
+            })
+            return response.get_json().get('access_token') if response.status_code == 200 else None
+
+        self.tokens = [t for t in self._fan_out(login, users) if t]
+
+    def bookings(self):
+        if not self.tokens or not self.queues:
+            return
+
+        def book(_):
+            _, office_id, service_id = self.rng.choice(self.queues)
+            response = self._call(
+                'POST /api/appointments', 'POST', '/api/appointments',
+                token=self.rng.choice(self.tokens),
+                json={
+                    'office_id': office_id,
+                    'service_id': service_id,
+                    'appointment_date': date.today().isoformat(),
+                }
+            )
+            if response.status_code == 201:
+                return response.get_json()['appointment']['id']
+            return None
+
+        created = self._fan_out(book, range(self.spec.bookings))
+        self.appointment_ids = [a for a in created if a]
+
+    def status_polls(self):
+        def poll(i):
+            if i % 4 == 0 or not self.appointment_ids or not self.tokens:
+                self._call('GET /api/queues/status', 'GET', '/api/queues/status')
+            else:
+                self._call(
+                    'GET /api/appointments/{id}', 'GET',
+                    f'/api/appointments/{self.rng.choice(self.appointment_ids)}',
+                    token=self.rng.choice(self.tokens)
+                )
+
+        self._fan_out(poll, range(self.spec.status_polls))
+
+    def subscribe(self):
+        """Connect Socket.IO clients to queue rooms; returns them for disconnect"""
+        clients = []
+        for _ in range(self.spec.subscribers):
+            started = time.perf_counter()
+            client = socketio.test_client(self.app)
+            if self.queues:
+                client.emit('join_queue', {'queue_id': self.rng.choice(self.queues)[0]})
+            self.recorder.record('socket.io connect+join', time.perf_counter() - started,
+                                 client.is_connected())
+            clients.append(client)
+        return clients
+
+    def reminder_fan_out(self):
+        from app.services.notification_service import send_appointment_reminders
+
+        # Run notification tasks inline so their cost lands in this process
+        celery.conf.task_always_eager = True
+        started = time.perf_counter()
+        with self.app.app_context():
+            send_appointment_reminders()
+        self.recorder.record('task send_appointment_reminders', time.perf_counter() - started)
+
+    def run(self) -> Dict:
+        self.load_queues()
+        self.login_storm()
+        self.bookings()
+        subscribers = self.subscribe()
+        self.status_polls()
+        self.reminder_fan_out()
+        for client in subscribers:
+            client.disconnect()
+        self.recorder.stop()
+        return self.recorder.summary()
@@ -0,0 +1,231 @@
+"""
+Synthetic dataset generator for load tests
+
+Seeds offices, services, office_services, queues, users and appointments
+following the schema in schema.sql/init.sql. Output is deterministic for a
+given seed so runs on different commits see identical data. Ids are a pure
+function of (seed, table, row number), so every table, and every chunk of a
+large table, can be generated and COPY-loaded independently and in parallel.
+"""
+
+import random
+import uuid
+from dataclasses import dataclass, asdict
+from datetime import date, time, timedelta
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from faker import Faker
+from sqlalchemy import text
+from werkzeug.security import generate_password_hash
+
+from app.utils.bulk_loader import BulkLoader, CopyJob, CSVRowStream
+
+BENCH_PASSWORD = 'Bench@12345'
+BENCH_EMAIL_DOMAIN = 'bench.guvnl.test'
+
+SERVICES = [
+    ('New Electricity Connection', 45, 'Connection Services'),
+    ('Bill Payment and Queries', 15, 'Billing Services'),
+    ('Load Enhancement', 30, 'Connection Services'),
+    ('Meter Replacement', 30, 'Technical Services'),
+    ('Complaint Registration', 20, 'Customer Services'),
+    ('Subsidy and Scheme Applications', 35, 'Government Schemes'),
+    ('Name Transfer and Address Change', 40, 'Administrative Services'),
+    ('Disconnection and Reconnection', 25, 'Connection Services'),
+]
+
+CITIES = [
+    'Vadodara', 'Ahmedabad', 'Surat', 'Rajkot', 'Gandhinagar', 'Bhavnagar',
+    'Jamnagar', 'Junagadh', 'Anand', 'Bharuch', 'Mehsana', 'Morbi',
+]
+
+
+@dataclass
+class DatasetSpec:
+    """Size of the synthetic dataset"""
+    seed: int = 42
+    users: int = 1_000_000
+    offices: int = 48
+    days: int = 2
+    appointments_per_queue: int = 120
+    chunk_rows: int = 250_000
+
+
+def user_email(index: int) -> str:
+    """Email of the n-th synthetic citizen"""
+    return f'user{index}@{BENCH_EMAIL_DOMAIN}'
+
+
+def user_phone(index: int) -> str:
+    """Phone number of the n-th synthetic citizen"""
+    return f'+91{7000000000 + index}'
+
+
+TABLE_COLUMNS = {
+    'offices': ('id', 'name', 'code', 'address', 'city', 'state', 'postal_code', 'phone', 'email'),
+    'services': ('id', 'name', 'description', 'estimated_duration', 'category'),
+    'office_services': ('id', 'office_id', 'service_id'),
+    'queues': ('id', 'office_id', 'service_id', 'queue_date', 'max_tokens'),
+    'users': ('id', 'email', 'phone', 'password_hash', 'first_name', 'last_name', 'is_verified'),
+    'appointments': ('id', 'user_id', 'queue_id', 'token_number', 'appointment_date',
+                     'appointment_time', 'status'),
+}
+
+_TABLE_CODES = {table: code for code, table in enumerate(TABLE_COLUMNS, 1)}
+
+# Names are drawn from a seeded pool; calling Faker per row would dominate the load
+NAME_POOL_SIZE = 2000
+
+
+class SyntheticDataset:
+    """Generates rows for each table as tuples in TABLE_COLUMNS order"""
+
+    def __init__(self, spec: DatasetSpec, today: Optional[date] = None):
+        self.spec = spec
+        self.today = today or date.today()
+        self._prefix = random.Random(spec.seed).getrandbits(64)
+        self.faker = Faker('en_IN')
+        self.faker.seed_instance(spec.seed)
+        self.first_names = [self.faker.first_name() for _ in range(NAME_POOL_SIZE)]
+        self.last_names = [self.faker.last_name() for _ in range(NAME_POOL_SIZE)]
+        self._password_hash = None
+
+    def row_id(self, table: str, index: int) -> str:
+        """Deterministic UUID of the n-th row of a table"""
+        return str(uuid.UUID(int=(self._prefix << 64) | (_TABLE_CODES[table] << 48) | index, version=4))
+
+    def sizes(self) -> Dict[str, int]:
+        """Row count per table"""
+        services = len(SERVICES)
+        queues = self.spec.days * self.spec.offices * services
+        return {
+            'offices': self.spec.offices,
+            'services': services,
+            'office_services': self.spec.offices * services,
+            'queues': queues,
+            'users': self.spec.users,
+            'appointments': queues * self.spec.appointments_per_queue,
+        }
+
+    def rows(self, table: str, start: int, stop: int) -> Iterator[Tuple]:
+        """Rows [start, stop) of a table; the same range always yields the same rows"""
+        rng = random.Random(f'{self.spec.seed}:{table}:{start}')
+        return getattr(self, f'_{table}')(rng, start, stop)
+
+    def _offices(self, rng: random.Random, start: int, stop: int) -> Iterator[Tuple]:
+        faker = Faker('en_IN')
+        faker.seed_instance(f'{self.spec.seed}:offices:{start}')
+        for i in range(start, stop):
+            city = CITIES[i % len(CITIES)]
+            yield (
+                self.row_id('offices', i), f'GUVNL {city} Division {i // len(CITIES) + 1}',
+                f'BENCH-{i:04d}', faker.street_address(), city, 'Gujarat', faker.postcode(),
+                faker.phone_number()[:20], f'office{i}@{BENCH_EMAIL_DOMAIN}',
+            )
+
+    def _services(self, rng: random.Random, start: int, stop: int) -> Iterator[Tuple]:
+        for i in range(start, stop):
+            name, duration, category = SERVICES[i]
+            yield (self.row_id('services', i), name, f'{name} (benchmark)', duration, category)
+
+    def _office_services(self, rng: random.Random, start: int, stop: int) -> Iterator[Tuple]:
+        services = len(SERVICES)
+        for i in range(start, stop):
+            office, service = divmod(i, services)
+            yield (self.row_id('office_services', i), self.row_id('offices', office),
+                   self.row_id('services', service))
+
+    def _queues(self, rng: random.Random, start: int, stop: int) -> Iterator[Tuple]:
+        services = len(SERVICES)
+        per_day = self.spec.offices * services
+        max_tokens = max(150, self.spec.appointments_per_queue * 2)
+        for i in range(start, stop):
+            day, cell = divmod(i, per_day)
+            office, service = divmod(cell, services)
+            yield (self.row_id('queues', i), self.row_id('offices', office),
+                   self.row_id('services', service), self.today + timedelta(days=day), max_tokens)
+
+    def _users(self, rng: random.Random, start: int, stop: int) -> Iterator[Tuple]:
+        # Hashing is deliberately slow; every synthetic user shares one hash
+        if self._password_hash is None:
+            self._password_hash = generate_password_hash(BENCH_PASSWORD)
+        for i in range(start, stop):
+            yield (self.row_id('users', i), user_email(i), user_phone(i), self._password_hash,
+                   rng.choice(self.first_names), rng.choice(self.last_names), True)
+
+    def _appointments(self, rng: random.Random, start: int, stop: int) -> Iterator[Tuple]:
+        per_queue = self.spec.appointments_per_queue
+        per_day = self.spec.offices * len(SERVICES)
+        for i in range(start, stop):
+            queue, token = divmod(i, per_queue)
+            token += 1
+            minutes = 9 * 60 + (token - 1) * 4
+            yield (
+                self.row_id('appointments', i),
+                self.row_id('users', rng.randrange(self.spec.users)) if self.spec.users else None,
+                self.row_id('queues', queue), token, self.today + timedelta(days=queue // per_day),
+                time(min(minutes // 60, 23), minutes % 60),
+                'confirmed' if rng.random() < 0.7 else 'scheduled',
+            )
+
+    def copy_jobs(self, tables: Sequence[str] = tuple(TABLE_COLUMNS)) -> List[CopyJob]:
+        """COPY jobs for the dataset, large tables split into chunk_rows pieces"""
+        jobs = []
+        sizes = self.sizes()
+        for table in tables:
+            for start in range(0, sizes[table], self.spec.chunk_rows):
+                stop = min(start + self.spec.chunk_rows, sizes[table])
+                jobs.append(CopyJob(
+                    table, TABLE_COLUMNS[table],
+                    lambda table=table, start=start, stop=stop: CSVRowStream(self.rows(table, start, stop))
+                ))
+        return jobs
+
+
+def seed_database(engine, spec: DatasetSpec, workers: int = 4, defer_indexes: bool = True) -> Dict:
+    """COPY the synthetic dataset in and return a manifest describing it"""
+    dataset = SyntheticDataset(spec)
+
+    with engine.begin() as conn:
+        # Queues, office_services and appointments cascade from offices/services
+        conn.execute(text("DELETE FROM offices WHERE code LIKE 'BENCH-%'"))
+        conn.execute(text("DELETE FROM services WHERE description LIKE '%(benchmark)'"))
+        conn.execute(text("DELETE FROM users WHERE email LIKE :pattern"),
+                     {'pattern': f'%@{BENCH_EMAIL_DOMAIN}'})
+
+    report = BulkLoader(engine, workers=workers).load(dataset.copy_jobs(), defer_indexes=defer_indexes)
+    for line in report.lines():
+        print(line)
+
+    return {
+        'spec': asdict(spec),
+        'counts': report.rows,
+        'rows_per_second': round(report.total_rows / report.load_seconds) if report.load_seconds else None,
+        'seeded_on': dataset.today.isoformat(),
+    }
+
+
+def redate_dataset(engine, manifest: Dict, workers: int = 4) -> bool:
+    """Reload queues and appointments dated from today if the dataset was seeded on an earlier day
+
+    The peak scenario books into and polls today's queues; without this a
+    dataset seeded yesterday silently benchmarks empty queues. Updates the
+    manifest's seeded_on and returns True if the rows were reloaded.
+    """
+    today = date.today()
+    if manifest.get('seeded_on') == today.isoformat():
+        return False
+
+    dataset = SyntheticDataset(DatasetSpec(**manifest['spec']), today)
+    with engine.begin() as conn:
+        # Appointments cascade from queues
+        conn.execute(text(
+            "DELETE FROM queues WHERE office_id IN (SELECT id FROM offices WHERE code LIKE 'BENCH-%')"
+        ))
+
+    report = BulkLoader(engine, workers=workers).load(dataset.copy_jobs(('queues', 'appointments')))
+    for line in report.lines():
+        print(line)
+
+    manifest['seeded_on'] = today.isoformat()
+    return True
@@ -0,0 +1,342 @@
+"""
+Bulk loader for GUVNL Queue Management System
+Streams rows into PostgreSQL with COPY FROM STDIN, one connection per job
+and several jobs in parallel, with secondary indexes, unique/foreign-key
+constraints and user triggers dropped during the load and rebuilt after
+"""
+
+import csv
+import io
+import logging
+import os
+import re
+import time
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import IO, Callable, Dict, Iterable, List, Optional, Sequence
+
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+COPY_BUFFER_SIZE = 1024 * 1024
+
+_IDENTIFIER = re.compile(r'^[a-z_][a-z0-9_]*$')
+
+_INDEXES_SQL = """
+    SELECT c.relname, i.relname, pg_get_indexdef(x.indexrelid)
+    FROM pg_index x
+    JOIN pg_class i ON i.oid = x.indexrelid
+    JOIN pg_class c ON c.oid = x.indrelid
+    WHERE c.relname = ANY(%(tables)s) AND c.relnamespace = 'public'::regnamespace
+      AND NOT x.indisprimary
+      AND NOT EXISTS (SELECT 1 FROM pg_constraint k WHERE k.conindid = x.indexrelid)
+"""
+
+# Unique constraints that a foreign key depends on have to stay
+_CONSTRAINTS_SQL = """
+    SELECT c.relname, k.conname, k.contype, pg_get_constraintdef(k.oid)
+    FROM pg_constraint k
+    JOIN pg_class c ON c.oid = k.conrelid
+    WHERE c.relname = ANY(%(tables)s) AND c.relnamespace = 'public'::regnamespace
+      AND k.contype IN ('f', 'u')
+      AND NOT (k.contype = 'u' AND EXISTS (
+          SELECT 1 FROM pg_constraint f WHERE f.contype = 'f' AND f.conindid = k.conindid
+      ))
+    ORDER BY k.contype = 'f' DESC, c.relname, k.conname
+"""
+
+# Foreign keys between the tables being loaded: (referencing table, referenced table)
+_REFERENCES_SQL = """
+    SELECT c.relname, r.relname
+    FROM pg_constraint k
+    JOIN pg_class c ON c.oid = k.conrelid
+    JOIN pg_class r ON r.oid = k.confrelid
+    WHERE k.contype = 'f' AND c.relname = ANY(%(tables)s) AND r.relname = ANY(%(tables)s)
+      AND c.relnamespace = 'public'::regnamespace AND c.oid <> r.oid
+"""
+
+
+@dataclass
+class CopyJob:
+    """One COPY into a table; a large table may be split across several jobs"""
+    table: str
+    columns: Sequence[str]
+    open: Callable[[], IO[bytes]]
+    header: bool = False
+
+    def statement(self) -> str:
+        options = 'FORMAT csv, HEADER true' if self.header else 'FORMAT csv'
+        return f"COPY {self.table} ({', '.join(self.columns)}) FROM STDIN WITH ({options})"
+
+
+@dataclass
+class LoadReport:
+    """Rows and wall-clock time per table, plus the index/constraint rebuild"""
+    rows: Dict[str, int] = field(default_factory=dict)
+    seconds: Dict[str, float] = field(default_factory=dict)
+    load_seconds: float = 0.0
+    rebuild_seconds: float = 0.0
+
+    @property
+    def total_rows(self) -> int:
+        return sum(self.rows.values())
+
+    def lines(self) -> List[str]:
+        lines = [
+            f"{table:<20} {rows:>12,} rows {self.seconds[table]:8.1f}s "
+            f"{rows / self.seconds[table] if self.seconds[table] else 0:>12,.0f} rows/s"
+            for table, rows in self.rows.items()
+        ]
+        lines.append(
+            f"{'total':<20} {self.total_rows:>12,} rows {self.load_seconds:8.1f}s "
+            f"{self.total_rows / self.load_seconds if self.load_seconds else 0:>12,.0f} rows/s"
+        )
+        lines.append(f"{'index/constraint rebuild':<26} {self.rebuild_seconds:21.1f}s")
+        return lines
+
+
+class CSVRowStream(io.RawIOBase):
+    """Read-only file object that CSV-encodes rows on demand for copy_expert"""
+
+    def __init__(self, rows: Iterable[Sequence], rows_per_chunk: int = 2000):
+        self._rows = iter(rows)
+        self._rows_per_chunk = rows_per_chunk
+        self._text = io.StringIO()
+        self._writer = csv.writer(self._text, lineterminator='\n')
+        self._pending = b''
+
+    def readable(self) -> bool:
+        return True
+
+    def read(self, size: int = -1) -> bytes:
+        while size < 0 or len(self._pending) < size:
+            chunk = list(islice(self._rows, self._rows_per_chunk))
+            if not chunk:
+                break
+            self._writer.writerows(chunk)
+            self._pending += self._text.getvalue().encode('utf-8')
+            self._text.seek(0)
+            self._text.truncate()
+        if size < 0:
+            size = len(self._pending)
+        data, self._pending = self._pending[:size], self._pending[size:]
+        return data
+
+
+def _native_threading():
+    """Real OS threads, even when eventlet has monkey-patched threading"""
+    try:
+        from eventlet import patcher
+        return patcher.original('threading')
+    except ImportError:
+        import threading
+        return threading
+
+
+def disable_green_mode():
+    """COPY is not supported under the eventlet wait callback; loaders run blocking"""
+    from psycopg2 import extensions
+    extensions.set_wait_callback(None)
+
+
+class BulkLoader:
+    """Runs CopyJobs in parallel over dedicated psycopg2 connections"""
+
+    def __init__(self, engine: Engine, workers: int = 4, maintenance_work_mem: str = '512MB'):
+        # Direct connections: the SQLAlchemy pool may hold eventlet locks that native threads cannot use
+        self.dsn = engine.url.set(drivername='postgresql').render_as_string(hide_password=False)
+        self.workers = max(1, workers)
+        self.maintenance_work_mem = maintenance_work_mem
+
+    def _connect(self):
+        import psycopg2
+        conn = psycopg2.connect(self.dsn)
+        with conn.cursor() as cursor:
+            # A crash mid-load means reloading anyway; skip waiting on WAL flushes
+            cursor.execute("SET synchronous_commit = off")
+            cursor.execute("SET maintenance_work_mem = %s", (self.maintenance_work_mem,))
+        conn.commit()
+        return conn
+
+    def load(self, jobs: List[CopyJob], defer_indexes: bool = True) -> LoadReport:
+        """Load every job; indexes, constraints and triggers come back even if a job fails"""
+        disable_green_mode()
+        tables = list(dict.fromkeys(job.table for job in jobs))
+        report = LoadReport(rows=dict.fromkeys(tables, 0), seconds=dict.fromkeys(tables, 0.0))
+
+        # Filled as each DROP succeeds, so a failure part-way restores exactly what is gone
+        indexes: List = []
+        constraints: List = []
+        try:
+            if defer_indexes:
+                self._drop_deferred(tables, indexes, constraints)
+            started = time.perf_counter()
+            table_started: Dict[str, float] = {}
+
+            def run(job: CopyJob):
+                table_started.setdefault(job.table, time.perf_counter())
+                conn = self._connect()
+                try:
+                    with conn.cursor() as cursor, job.open() as stream:
+                        cursor.copy_expert(job.statement(), stream, size=COPY_BUFFER_SIZE)
+                        rows = cursor.rowcount
+                    conn.commit()
+                finally:
+                    conn.close()
+                return job.table, rows, time.perf_counter()
+
+            if defer_indexes:
+                batches = [jobs]
+            else:
+                # Foreign keys are live: referenced tables must be committed first, so
+                # only one table's chunks run in parallel at a time
+                batches = [[job for job in jobs if job.table == table] for table in self._fk_order(tables)]
+            for batch in batches:
+                for table, rows, finished in self._parallel(run, batch):
+                    report.rows[table] += rows
+                    report.seconds[table] = max(report.seconds[table], finished - table_started[table])
+            report.load_seconds = time.perf_counter() - started
+        finally:
+            if defer_indexes:
+                started = time.perf_counter()
+                self._restore_deferred(tables, indexes, constraints)
+                report.rebuild_seconds = time.perf_counter() - started
+        return report
+
+    def _fk_order(self, tables: List[str]) -> List[str]:
+        """Tables ordered so every table comes after the tables it references, else as given"""
+        conn = self._connect()
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(_REFERENCES_SQL, {'tables': tables})
+                references = cursor.fetchall()
+        finally:
+            conn.close()
+
+        depends_on: Dict[str, set] = {table: set() for table in tables}
+        for table, referenced in references:
+            depends_on[table].add(referenced)
+        ordered: List[str] = []
+        while len(ordered) < len(tables):
+            ready = [t for t in tables if t not in ordered and depends_on[t] <= set(ordered)]
+            if not ready:
+                raise ValueError(f'Circular foreign keys between {", ".join(t for t in tables if t not in ordered)}; '
+                                 'load with deferred constraints instead')
+            ordered.append(ready[0])
+        return ordered
+
+    def _parallel(self, fn: Callable, items: Sequence) -> List:
+        """Run fn over items on native threads; re-raise the first failure"""
+        threading = _native_threading()
+        items = list(items)
+        results: List = [None] * len(items)
+        errors: List[BaseException] = []
+        lock = threading.Lock()
+        position = [0]
+
+        def worker():
+            while True:
+                with lock:
+                    if errors or position[0] >= len(items):
+                        return
+                    index = position[0]
+                    position[0] += 1
+                try:
+                    results[index] = fn(items[index])
+                except BaseException as e:
+                    with lock:
+                        errors.append(e)
+
+        threads = [threading.Thread(target=worker, daemon=True) for _ in range(min(self.workers, len(items)))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        if errors:
+            raise errors[0]
+        return results
+
+    def _drop_deferred(self, tables: List[str], indexes: List, constraints: List):
+        """Drop secondary indexes and unique/FK constraints, disable user triggers
+
+        Each index and constraint is appended to indexes/constraints once its
+        DROP has succeeded, so the caller can restore them if a later DROP fails.
+        """
+        conn = self._connect()
+        conn.autocommit = True
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(_INDEXES_SQL, {'tables': tables})
+                found_indexes = cursor.fetchall()
+                cursor.execute(_CONSTRAINTS_SQL, {'tables': tables})
+                found_constraints = cursor.fetchall()
+
+                # Logged first so a killed load can be repaired by hand
+                for table, name, ddl in found_indexes:
+                    logger.info(f"Deferring index on {table}: {ddl}")
+                for table, name, kind, definition in found_constraints:
+                    logger.info(f'Deferring constraint: ALTER TABLE {table} ADD CONSTRAINT "{name}" {definition}')
+
+                for constraint in found_constraints:
+                    table, name, kind, definition = constraint
+                    cursor.execute(f'ALTER TABLE {table} DROP CONSTRAINT "{name}"')
+                    constraints.append(constraint)
+                for index in found_indexes:
+                    table, name, ddl = index
+                    cursor.execute(f'DROP INDEX "{name}"')
+                    indexes.append(index)
+                for table in tables:
+                    cursor.execute(f'ALTER TABLE {table} DISABLE TRIGGER USER')
+        finally:
+            conn.close()
+
+    def _restore_deferred(self, tables: List[str], indexes, constraints):
+        """Rebuild indexes and unique constraints in parallel, then foreign keys, then re-enable triggers"""
+        def execute(statement: str):
+            conn = self._connect()
+            conn.autocommit = True
+            try:
+                with conn.cursor() as cursor:
+                    cursor.execute(statement)
+            finally:
+                conn.close()
+
+        build = [ddl for _, _, ddl in indexes]
+        build += [f'ALTER TABLE {table} ADD CONSTRAINT "{name}" {definition}'
+                  for table, name, kind, definition in constraints if kind == 'u']
+        foreign_keys = [f'ALTER TABLE {table} ADD CONSTRAINT "{name}" {definition}'
+                        for table, name, kind, definition in constraints if kind == 'f']
+        # Keep going after a failure so one bad row does not leave every other index missing
+        failures = []
+        for statements in (build, foreign_keys):
+            def attempt(statement):
+                try:
+                    execute(statement)
+                except Exception as e:
+                    failures.append((statement, e))
+            self._parallel(attempt, statements)
+        execute('; '.join(f'ALTER TABLE {table} ENABLE TRIGGER USER' for table in tables))
+        execute(f"ANALYZE {', '.join(tables)}")
+
+        for statement, error in failures:
+            logger.error(f"Could not restore after bulk load: {statement}: {str(error)}")
+        if failures:
+            raise RuntimeError(f'{len(failures)} index/constraint rebuilds failed; see log for the DDL')
+
+
+def csv_directory_jobs(directory: str, tables: Optional[Sequence[str]] = None) -> List[CopyJob]:
+    """One job per <table>.csv (with a header row) in directory, in the given table order"""
+    names = tables or sorted(
+        name[:-4] for name in os.listdir(directory) if name.endswith('.csv')
+    )
+    jobs = []
+    for table in names:
+        path = os.path.join(directory, f'{table}.csv')
+        with open(path, newline='') as fh:
+            columns = next(csv.reader(fh))
+        for name in (table, *columns):
+            if not _IDENTIFIER.match(name):
+                raise ValueError(f'{path}: invalid table or column name {name!r}')
+        jobs.append(CopyJob(table, columns, lambda path=path: open(path, 'rb'), header=True))
+    return jobs
@@ -0,0 +1,109 @@
+"""
+Catalog routes for GUVNL Queue Management System
+Public, read-mostly listings of offices and the services they offer
+"""
+
+from flask import Blueprint, jsonify, current_app
+from sqlalchemy import text
+
+from app import db
+from app.services.catalog_cache import catalog_cache
+from app.utils.serializers import OFFICE, SERVICE
+
+bp = Blueprint('catalog', __name__)
+
+OFFICE_COLUMNS = ', '.join(OFFICE.fields)
+SERVICE_COLUMNS = ', '.join(SERVICE.fields)
+
+
+@bp.route('/offices', methods=['GET'])
+@catalog_cache.cached('offices')
+def get_offices():
+    """Get all active offices"""
+    try:
+        rows = db.session.execute(text(
+            f"SELECT {OFFICE_COLUMNS} FROM offices WHERE is_active ORDER BY name"
+        )).fetchall()
+        return jsonify({'offices': OFFICE.dump_many(rows)}), 200
+
+    except Exception as e:
+        current_app.logger.error(f"Offices fetch error: {str(e)}")
+        return jsonify({'message': 'Failed to fetch offices'}), 500
+
+
+@bp.route('/offices/<office_id>', methods=['GET'])
+@catalog_cache.cached('office')
+def get_office(office_id):
+    """Get office details"""
+    try:
+        row = db.session.execute(text(
+            f"SELECT {OFFICE_COLUMNS} FROM offices WHERE id = :office_id AND is_active"
+        ), {'office_id': office_id}).first()
+
+        if not row:
+            return jsonify({'message': 'Office not found'}), 404
+
+        return jsonify({'office': OFFICE.dump(row)}), 200
+
+    except Exception as e:
+        current_app.logger.error(f"Office fetch error: {str(e)}")
+        return jsonify({'message': 'Failed to fetch office'}), 500
+
+
+@bp.route('/offices/<office_id>/services', methods=['GET'])
+@catalog_cache.cached('office_services')
+def get_office_services(office_id):
+    """Get services available at an office"""
+    try:
+        # Unknown offices must 404: only 200s are cached, so arbitrary ids cannot fill Redis
+        office = db.session.execute(text(
+            "SELECT 1 FROM offices WHERE id = :office_id AND is_active"
+        ), {'office_id': office_id}).first()
+        if not office:
+            return jsonify({'message': 'Office not found'}), 404
+
+        rows = db.session.execute(text(
+            "SELECT s.id, s.name, s.description, s.estimated_duration, s.category, s.required_documents "
+            "FROM services s JOIN office_services os ON os.service_id = s.id "
+            "WHERE os.office_id = :office_id AND os.is_available AND s.is_active "
+            "ORDER BY s.name"
+        ), {'office_id': office_id}).fetchall()
+        return jsonify({'services': SERVICE.dump_many(rows)}), 200
+
+    except Exception as e:
+        current_app.logger.error(f"Office services fetch error: {str(e)}")
+        return jsonify({'message': 'Failed to fetch office services'}), 500
+
+
+@bp.route('/services', methods=['GET'])
+@catalog_cache.cached('services')
+def get_services():
+    """Get all active services"""
+    try:
+        rows = db.session.execute(text(
+            f"SELECT {SERVICE_COLUMNS} FROM services WHERE is_active ORDER BY name"
+        )).fetchall()
+        return jsonify({'services': SERVICE.dump_many(rows)}), 200
+
+    except Exception as e:
+        current_app.logger.error(f"Services fetch error: {str(e)}")
+        return jsonify({'message': 'Failed to fetch services'}), 500
+
+
+@bp.route('/services/<service_id>', methods=['GET'])
+@catalog_cache.cached('service')
+def get_service(service_id):
+    """Get service details"""
+    try:
+        row = db.session.execute(text(
+            f"SELECT {SERVICE_COLUMNS} FROM services WHERE id = :service_id AND is_active"
+        ), {'service_id': service_id}).first()
+
+        if not row:
+            return jsonify({'message': 'Service not found'}), 404
+
+        return jsonify({'service': SERVICE.dump(row)}), 200
+
+    except Exception as e:
+        current_app.logger.error(f"Service fetch error: {str(e)}")
+        return jsonify({'message': 'Failed to fetch service'}), 500
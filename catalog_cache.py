@@ -0,0 +1,206 @@
+"""
+Catalog response cache for GUVNL Queue Management System
+Caches serialized offices/services responses in Redis and per process,
+keyed by a catalog version that is bumped whenever catalog rows change.
+ORM flushes bump it automatically; raw SQL, COPY and other bulk writes to
+CATALOG_TABLES bypass the session and must call catalog_cache.bump().
+"""
+
+import hashlib
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from functools import wraps
+from typing import Callable, Dict, Iterable, Optional, Tuple
+from urllib.parse import urlencode
+
+from flask import current_app, has_app_context, make_response, request
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+CATALOG_TABLES = frozenset({'offices', 'services', 'office_services'})
+
+VERSION_KEY = 'catalog:version'
+
+# Delete the lock only if we still own it
+_RELEASE_LOCK_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+class CatalogCache:
+    """Two-level (process + Redis) cache for public catalog responses"""
+
+    def __init__(self):
+        self._local: 'OrderedDict[str, Tuple[str, bytes]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._version: Optional[int] = None
+        self._version_checked_at = 0.0
+
+    def init_app(self, app):
+        """Register commit hooks that bump the version on catalog writes"""
+        app.extensions['catalog_cache'] = self
+        if not event.contains(Session, 'after_flush', _track_catalog_changes):
+            event.listen(Session, 'after_flush', _track_catalog_changes)
+            event.listen(Session, 'after_commit', _bump_after_commit)
+            event.listen(Session, 'after_rollback', _discard_after_rollback)
+
+    def version(self) -> int:
+        """Current catalog version, re-read from Redis at most every CATALOG_VERSION_CHECK_SECONDS"""
+        now = time.monotonic()
+        if self._version is None or now - self._version_checked_at >= current_app.config['CATALOG_VERSION_CHECK_SECONDS']:
+            try:
+                version = int(current_app.redis.get(VERSION_KEY) or 0)
+            except Exception as e:
+                logger.warning(f"Catalog version lookup failed: {str(e)}")
+                version = self._version or 0
+            if version != self._version:
+                with self._lock:
+                    self._local.clear()
+            self._version = version
+            self._version_checked_at = now
+        return self._version
+
+    def bump(self) -> int:
+        """Invalidate every cached catalog response in all processes"""
+        version = int(current_app.redis.incr(VERSION_KEY))
+        with self._lock:
+            self._local.clear()
+        self._version = version
+        self._version_checked_at = time.monotonic()
+        logger.info(f"Catalog version bumped to {version}")
+        return version
+
+    def cached(self, name: str, query_args: Iterable[str] = ()) -> Callable:
+        """Decorator caching a view's 200 JSON response with ETag revalidation
+
+        Only the view arguments and the listed query_args (the ones the view
+        reads) are part of the key, so junk query strings share one entry.
+        Only 200s are stored: views must 404 for ids that do not exist, or
+        requests with made-up ids would each add an entry.
+        """
+        query_args = tuple(sorted(query_args))
+
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                version = self.version()
+                key = _cache_key(version, name, kwargs, query_args)
+
+                def build():
+                    response = make_response(view(*args, **kwargs))
+                    if response.status_code != 200:
+                        return None, response
+                    body = response.get_data()
+                    etag = f'{version}-{hashlib.sha1(body).hexdigest()[:16]}'
+                    return (etag, body), response
+
+                entry, response = self._get_or_fill(key, build)
+                if entry is None:
+                    return response
+
+                etag, body = entry
+                response = current_app.response_class(body, mimetype='application/json')
+                response.set_etag(etag)
+                response.cache_control.public = True
+                response.cache_control.max_age = current_app.config['CATALOG_CACHE_MAX_AGE']
+                return response.make_conditional(request)
+            return wrapper
+        return decorator
+
+    def _get_or_fill(self, key: str, build: Callable):
+        entry = self._local_get(key)
+        if entry is not None:
+            return entry, None
+
+        redis_client = current_app.redis
+        entry = _decode(redis_client.get(key))
+        if entry is not None:
+            self._local_set(key, entry)
+            return entry, None
+
+        # Cold fill: one process rebuilds, the others wait for its result
+        lock_key = f'{key}:lock'
+        token = uuid.uuid4().hex
+        lock_ms = current_app.config['CATALOG_FILL_LOCK_MS']
+        if redis_client.set(lock_key, token, nx=True, px=lock_ms):
+            try:
+                entry, response = build()
+                if entry is not None:
+                    redis_client.set(key, _encode(entry), ex=current_app.config['CATALOG_CACHE_TTL'])
+                    self._local_set(key, entry)
+                return entry, response
+            finally:
+                redis_client.eval(_RELEASE_LOCK_SCRIPT, 1, lock_key, token)
+
+        deadline = time.monotonic() + lock_ms / 1000.0
+        while time.monotonic() < deadline:
+            time.sleep(0.025)
+            entry = _decode(redis_client.get(key))
+            if entry is not None:
+                self._local_set(key, entry)
+                return entry, None
+
+        # The filler is too slow or died; serve uncached rather than time out
+        return build()
+
+    def _local_get(self, key: str):
+        with self._lock:
+            entry = self._local.get(key)
+            if entry is not None:
+                self._local.move_to_end(key)
+            return entry
+
+    def _local_set(self, key: str, entry: Tuple[str, bytes]):
+        with self._lock:
+            self._local[key] = entry
+            self._local.move_to_end(key)
+            while len(self._local) > current_app.config['CATALOG_LOCAL_CACHE_SIZE']:
+                self._local.popitem(last=False)
+
+
+def _cache_key(version: int, name: str, view_args: Dict, query_args: Tuple[str, ...]) -> str:
+    params = [(arg, view_args[arg]) for arg in sorted(view_args)]
+    params += [(arg, value) for arg in query_args for value in request.args.getlist(arg)]
+    return f'catalog:{version}:{name}:{urlencode(params)}'
+
+
+def _encode(entry: Tuple[str, bytes]) -> bytes:
+    etag, body = entry
+    return etag.encode() + b'\n' + body
+
+
+def _decode(raw: Optional[bytes]) -> Optional[Tuple[str, bytes]]:
+    if raw is None:
+        return None
+    etag, _, body = raw.partition(b'\n')
+    return etag.decode(), body
+
+
+def _track_catalog_changes(session, flush_context):
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if getattr(obj, '__tablename__', None) in CATALOG_TABLES:
+            session.info['catalog_changed'] = True
+            return
+
+
+def _bump_after_commit(session):
+    if session.info.pop('catalog_changed', False) and has_app_context():
+        try:
+            catalog_cache.bump()
+        except Exception as e:
+            logger.error(f"Failed to bump catalog version: {str(e)}")
+
+
+def _discard_after_rollback(session):
+    session.info.pop('catalog_changed', None)
+
+
+catalog_cache = CatalogCache()
@@ -0,0 +1,109 @@
+"""
+Dashboard routes for GUVNL Queue Management System
+Staff dashboard and queue metrics served from the in-memory aggregates,
+with live deltas pushed over Socket.IO
+"""
+
+from flask import Blueprint, request, jsonify, current_app
+from flask_jwt_extended import jwt_required, get_jwt_identity, decode_token
+from flask_socketio import emit, join_room, leave_room
+
+from app import socketio
+from app.models.user import User
+from app.services.dashboard_service import dashboard_aggregates, office_room, ALL_OFFICES_ROOM
+from app.services.session_service import session_store
+
+bp = Blueprint('dashboard', __name__)
+
+STAFF_ROLES = ('staff', 'admin', 'super_admin')
+
+
+def _is_staff(user_id) -> bool:
+    user = User.query.get(user_id)
+    return bool(user and user.role in STAFF_ROLES)
+
+
+def _slice_args(args):
+    """office_id/service_id filters, or a 404 response if either is unknown"""
+    office_id = args.get('office_id') or None
+    service_id = args.get('service_id') or None
+    if not dashboard_aggregates.knows(office_id, service_id):
+        return None, (jsonify({'message': 'Office or service not found'}), 404)
+    return (office_id, service_id), None
+
+
+@bp.route('/dashboard', methods=['GET'])
+@jwt_required()
+def get_dashboard():
+    """Today's appointment counts by status, office and service"""
+    try:
+        if not _is_staff(get_jwt_identity()):
+            return jsonify({
+                'message': 'Insufficient permissions',
+                'error_code': 'INSUFFICIENT_PERMISSIONS'
+            }), 403
+
+        dashboard_aggregates.ensure_started()
+        filters, error = _slice_args(request.args)
+        if error:
+            return error
+        return jsonify(dashboard_aggregates.dashboard(*filters)), 200
+
+    except Exception as e:
+        current_app.logger.error(f"Dashboard fetch error: {str(e)}")
+        return jsonify({'message': 'Failed to fetch dashboard'}), 500
+
+
+@bp.route('/metrics', methods=['GET'])
+@jwt_required()
+def get_metrics():
+    """Today's average wait and service times"""
+    try:
+        if not _is_staff(get_jwt_identity()):
+            return jsonify({
+                'message': 'Insufficient permissions',
+                'error_code': 'INSUFFICIENT_PERMISSIONS'
+            }), 403
+
+        dashboard_aggregates.ensure_started()
+        filters, error = _slice_args(request.args)
+        if error:
+            return error
+        return jsonify(dashboard_aggregates.metrics(*filters)), 200
+
+    except Exception as e:
+        current_app.logger.error(f"Metrics fetch error: {str(e)}")
+        return jsonify({'message': 'Failed to fetch metrics'}), 500
+
+
+@socketio.on('join_dashboard')
+def on_join_dashboard(data):
+    """Subscribe a staff client to dashboard deltas for one office or all offices"""
+    # decode_token skips the checks jwt_required() makes: token type and the session blocklist
+    try:
+        claims = decode_token(data.get('token', ''))
+        valid = claims.get('type') == 'access' and not session_store.is_revoked(claims)
+    except Exception:
+        valid = False
+    if not valid:
+        emit('error', {'message': 'Invalid token'})
+        return
+    user_id = claims['sub']
+    if not _is_staff(user_id):
+        emit('error', {'message': 'Insufficient permissions'})
+        return
+
+    dashboard_aggregates.ensure_started()
+    office_id = data.get('office_id') or None
+    if not dashboard_aggregates.knows(office_id):
+        emit('error', {'message': 'Office not found'})
+        return
+
+    join_room(office_room(office_id) if office_id else ALL_OFFICES_ROOM)
+    emit('dashboard_snapshot', dashboard_aggregates.dashboard(office_id))
+
+
+@socketio.on('leave_dashboard')
+def on_leave_dashboard(data):
+    office_id = (data or {}).get('office_id') or None
+    leave_room(office_room(office_id) if office_id else ALL_OFFICES_ROOM)
@@ -0,0 +1,370 @@
+"""
+Dashboard Service for GUVNL Queue Management System
+Keeps today's appointment counts as an office x service x status cube in
+compact arrays, refreshed incrementally in the background, so dashboard
+and metrics slices are served from memory and changes are pushed to staff
+over Socket.IO
+"""
+
+import logging
+import threading
+import time
+from array import array
+from datetime import date
+from typing import Dict, List, Optional, Set, Tuple
+
+from flask import current_app
+from prometheus_client import Histogram
+from sqlalchemy import text
+
+from app import db, socketio
+
+logger = logging.getLogger(__name__)
+
+STATUSES = ('scheduled', 'confirmed', 'in_progress', 'completed', 'cancelled', 'no_show')
+_STATUS_INDEX = {status: index for index, status in enumerate(STATUSES)}
+
+ALL_OFFICES_ROOM = 'dashboard:all'
+
+DASHBOARD_REFRESH = Histogram(
+    'guvnl_dashboard_refresh_seconds',
+    'Time to refresh the dashboard aggregates',
+    ['mode'],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+)
+
+# Today's appointments with their office/service; no GROUP BY, the cube does the counting
+_ROWS_SQL = (
+    "SELECT a.id, q.office_id, q.service_id, a.status, a.actual_wait_time, "
+    "EXTRACT(EPOCH FROM a.service_end_time - a.service_start_time) AS service_seconds "
+    "FROM appointments a JOIN queues q ON q.id = a.queue_id "
+    "WHERE a.appointment_date = :day"
+)
+
+
+def office_room(office_id) -> str:
+    return f'dashboard:{office_id}'
+
+
+class _Cube:
+    """Counts per (office, service, status) plus wait/service time sums per (office, service)"""
+
+    def __init__(self, day: date, office_ids: List[str], service_ids: List[str]):
+        self.day = day
+        self.office_ids = office_ids
+        self.service_ids = service_ids
+        self.office_index = {office_id: i for i, office_id in enumerate(office_ids)}
+        self.service_index = {service_id: i for i, service_id in enumerate(service_ids)}
+        cells = len(office_ids) * len(service_ids)
+        self.counts = array('l', [0]) * (cells * len(STATUSES))
+        self.wait_sum = array('d', [0.0]) * cells
+        self.wait_n = array('l', [0]) * cells
+        self.service_sum = array('d', [0.0]) * cells
+        self.service_n = array('l', [0]) * cells
+        # appointment id -> (cell, status index, wait minutes, service seconds)
+        self.rows: Dict[str, Tuple[int, int, Optional[float], Optional[float]]] = {}
+
+    def cell(self, office_id: str, service_id: str) -> Optional[int]:
+        office = self.office_index.get(office_id)
+        service = self.service_index.get(service_id)
+        if office is None or service is None:
+            return None
+        return office * len(self.service_ids) + service
+
+    def apply(self, appointment_id: str, cell: int, status: int,
+              wait: Optional[float], service: Optional[float],
+              changed_counts: Set[int], changed_times: Set[int]):
+        previous = self.rows.get(appointment_id)
+        entry = (cell, status, wait, service)
+        if previous == entry:
+            return
+        if previous is not None:
+            self._add(previous, -1, changed_counts, changed_times)
+        self._add(entry, 1, changed_counts, changed_times)
+        self.rows[appointment_id] = entry
+
+    def remove(self, appointment_id: str, changed_counts: Set[int], changed_times: Set[int]):
+        previous = self.rows.pop(appointment_id, None)
+        if previous is not None:
+            self._add(previous, -1, changed_counts, changed_times)
+
+    def _add(self, entry, sign: int, changed_counts: Set[int], changed_times: Set[int]):
+        cell, status, wait, service = entry
+        index = cell * len(STATUSES) + status
+        self.counts[index] += sign
+        changed_counts.add(index)
+        if wait is not None:
+            self.wait_sum[cell] += sign * wait
+            self.wait_n[cell] += sign
+            changed_times.add(cell)
+        if service is not None:
+            self.service_sum[cell] += sign * service
+            self.service_n[cell] += sign
+            changed_times.add(cell)
+
+    def split(self, cell: int) -> Tuple[str, str]:
+        office, service = divmod(cell, len(self.service_ids))
+        return self.office_ids[office], self.service_ids[service]
+
+    def times(self, cell: int) -> Dict:
+        return {
+            'avg_wait_minutes': round(self.wait_sum[cell] / self.wait_n[cell], 1) if self.wait_n[cell] else None,
+            'avg_service_minutes': round(self.service_sum[cell] / self.service_n[cell] / 60, 1) if self.service_n[cell] else None,
+        }
+
+
+class DashboardAggregates:
+    """Process-local dashboard store fed by a background refresh loop"""
+
+    def __init__(self):
+        self._cube: Optional[_Cube] = None
+        self._lock = threading.Lock()
+        self._app = None
+        self._refresher = None
+        self._since = None
+        self._full_refresh_at = 0.0
+        self._slices: Dict[Tuple, Dict] = {}
+        self.version = 0
+
+    def init_app(self, app):
+        self._app = app
+        app.extensions['dashboard_aggregates'] = self
+
+    def reset_after_fork(self):
+        """Drop state inherited from a parent process; call it once the worker is monkey-patched
+
+        The lock is recreated so it is a green lock: a native one held by a
+        greenlet across the refresh queries would block the whole worker.
+        """
+        self._lock = threading.Lock()
+        self._cube = None
+        self._refresher = None
+        self._since = None
+        self._full_refresh_at = 0.0
+        self._slices = {}
+
+    def ensure_started(self):
+        """Start the refresh loop on first use, so only processes serving dashboards run it"""
+        if self._refresher is not None:
+            return
+        with self._lock:
+            if self._refresher is None:
+                self.refresh()
+                self._refresher = socketio.start_background_task(self._run)
+
+    def _run(self):
+        while True:
+            socketio.sleep(self._app.config['DASHBOARD_REFRESH_SECONDS'])
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.error(f"Dashboard refresh failed: {str(e)}")
+
+    def refresh(self):
+        """Fold in appointments changed since the last pass; full reload daily and every few minutes"""
+        # Own app context, so db.session.remove() below never tears down a caller's request session
+        with self._app.app_context():
+            cube = self._cube
+            full = (
+                cube is None
+                or cube.day != date.today()
+                or time.monotonic() >= self._full_refresh_at
+            )
+            if full:
+                self._full_refresh()
+            elif not self._incremental_refresh():
+                self._full_refresh()
+
+    def _full_refresh(self):
+        started = time.perf_counter()
+        offices = [str(row[0]) for row in db.session.execute(text('SELECT id FROM offices ORDER BY name, id'))]
+        services = [str(row[0]) for row in db.session.execute(text('SELECT id FROM services ORDER BY name, id'))]
+        cube = _Cube(date.today(), offices, services)
+
+        since = db.session.execute(text('SELECT clock_timestamp()')).scalar()
+        for row in db.session.execute(text(_ROWS_SQL), {'day': cube.day}):
+            cell = cube.cell(str(row.office_id), str(row.service_id))
+            if cell is not None:
+                cube.apply(str(row.id), cell, _STATUS_INDEX[_status_name(row.status)],
+                           row.actual_wait_time, _seconds(row.service_seconds), set(), set())
+        db.session.remove()
+
+        unchanged = _same_totals(self._cube, cube)
+        self._cube = cube
+        self._since = since
+        self._full_refresh_at = time.monotonic() + current_app.config['DASHBOARD_FULL_REFRESH_SECONDS']
+        DASHBOARD_REFRESH.labels(mode='full').observe(time.perf_counter() - started)
+        if unchanged:
+            # The periodic reload only re-anchors the cube; don't make every open dashboard refetch
+            return
+        self._slices = {}
+        self.version += 1
+        # Every process keeps its own cube and serves its own clients: emits stay local
+        socketio.emit('dashboard_reset', {'version': self.version}, to=ALL_OFFICES_ROOM, ignore_queue=True)
+        for office_id in cube.office_ids:
+            socketio.emit('dashboard_reset', {'version': self.version}, to=office_room(office_id),
+                          ignore_queue=True)
+
+    def _incremental_refresh(self) -> bool:
+        """Apply recent changes and push deltas; False if a full reload is needed"""
+        started = time.perf_counter()
+        cube = self._cube
+        # Overlap covers transactions that stamped updated_at before committing
+        overlap = current_app.config['DASHBOARD_REFRESH_OVERLAP_SECONDS']
+        since = db.session.execute(text('SELECT clock_timestamp()')).scalar()
+        rows = db.session.execute(
+            text(_ROWS_SQL + " AND a.updated_at >= CAST(:since AS timestamptz) - make_interval(secs => :overlap)"),
+            {'day': cube.day, 'since': self._since, 'overlap': overlap}
+        ).fetchall()
+        # Deleted appointments and ones moved to another day never show up in the
+        # updated_at scan; a count mismatch says some of the cube's rows are gone
+        today_count = db.session.execute(
+            text("SELECT count(*) FROM appointments WHERE appointment_date = :day"), {'day': cube.day}
+        ).scalar()
+
+        changed_counts: Set[int] = set()
+        changed_times: Set[int] = set()
+        for row in rows:
+            cell = cube.cell(str(row.office_id), str(row.service_id))
+            if cell is None:
+                # New office or service since the last full reload
+                db.session.remove()
+                return False
+            cube.apply(str(row.id), cell, _STATUS_INDEX[_status_name(row.status)],
+                       row.actual_wait_time, _seconds(row.service_seconds), changed_counts, changed_times)
+        if today_count != len(cube.rows):
+            present = {str(row[0]) for row in db.session.execute(
+                text("SELECT id FROM appointments WHERE appointment_date = :day"), {'day': cube.day}
+            )}
+            for appointment_id in [a for a in cube.rows if a not in present]:
+                cube.remove(appointment_id, changed_counts, changed_times)
+        db.session.remove()
+        self._since = since
+        DASHBOARD_REFRESH.labels(mode='incremental').observe(time.perf_counter() - started)
+
+        if changed_counts or changed_times:
+            self._slices = {}
+            self.version += 1
+            self._push_deltas(cube, changed_counts, changed_times)
+        return True
+
+    def _push_deltas(self, cube: _Cube, changed_counts: Set[int], changed_times: Set[int]):
+        by_office: Dict[str, Dict[str, List]] = {}
+        for index in sorted(changed_counts):
+            cell, status = divmod(index, len(STATUSES))
+            office_id, service_id = cube.split(cell)
+            delta = by_office.setdefault(office_id, {'counts': [], 'times': []})
+            delta['counts'].append([service_id, STATUSES[status], cube.counts[index]])
+        for cell in sorted(changed_times):
+            office_id, service_id = cube.split(cell)
+            delta = by_office.setdefault(office_id, {'counts': [], 'times': []})
+            delta['times'].append([service_id, cube.times(cell)])
+
+        for office_id, delta in by_office.items():
+            payload = {'version': self.version, 'office_id': office_id, **delta}
+            socketio.emit('dashboard_delta', payload, to=office_room(office_id), ignore_queue=True)
+            socketio.emit('dashboard_delta', payload, to=ALL_OFFICES_ROOM, ignore_queue=True)
+
+    def dashboard(self, office_id: Optional[str] = None, service_id: Optional[str] = None) -> Dict:
+        """Counts by status, office and service for a slice of today's appointments"""
+        key = ('dashboard', office_id, service_id)
+        cached = self._slices.get(key)
+        if cached is not None:
+            return cached
+
+        cube = self._cube
+        statuses = len(STATUSES)
+        by_status = [0] * statuses
+        by_office: Dict[str, Dict[str, int]] = {}
+        by_service: Dict[str, Dict[str, int]] = {}
+        for cell in self._cells(cube, office_id, service_id):
+            base = cell * statuses
+            counts = cube.counts[base:base + statuses]
+            if not any(counts):
+                continue
+            cell_office, cell_service = cube.split(cell)
+            office_counts = by_office.setdefault(cell_office, dict.fromkeys(STATUSES, 0))
+            service_counts = by_service.setdefault(cell_service, dict.fromkeys(STATUSES, 0))
+            for status, count in enumerate(counts):
+                by_status[status] += count
+                office_counts[STATUSES[status]] += count
+                service_counts[STATUSES[status]] += count
+
+        result = {
+            'version': self.version,
+            'date': cube.day.isoformat(),
+            'total': sum(by_status),
+            'by_status': dict(zip(STATUSES, by_status)),
+            'by_office': by_office,
+            'by_service': by_service,
+        }
+        self._slices[key] = result
+        return result
+
+    def metrics(self, office_id: Optional[str] = None, service_id: Optional[str] = None) -> Dict:
+        """Average wait and service times for a slice, overall and per office/service"""
+        key = ('metrics', office_id, service_id)
+        cached = self._slices.get(key)
+        if cached is not None:
+            return cached
+
+        cube = self._cube
+        wait_sum = wait_n = service_sum = service_n = 0
+        cells = []
+        for cell in self._cells(cube, office_id, service_id):
+            if not cube.wait_n[cell] and not cube.service_n[cell]:
+                continue
+            wait_sum += cube.wait_sum[cell]
+            wait_n += cube.wait_n[cell]
+            service_sum += cube.service_sum[cell]
+            service_n += cube.service_n[cell]
+            cell_office, cell_service = cube.split(cell)
+            cells.append({'office_id': cell_office, 'service_id': cell_service, **cube.times(cell)})
+
+        completed = STATUSES.index('completed')
+        result = {
+            'version': self.version,
+            'date': cube.day.isoformat(),
+            'completed': sum(cube.counts[cell * len(STATUSES) + completed]
+                             for cell in self._cells(cube, office_id, service_id)),
+            'avg_wait_minutes': round(wait_sum / wait_n, 1) if wait_n else None,
+            'avg_service_minutes': round(service_sum / service_n / 60, 1) if service_n else None,
+            'by_office_service': cells,
+        }
+        self._slices[key] = result
+        return result
+
+    @staticmethod
+    def _cells(cube: _Cube, office_id: Optional[str], service_id: Optional[str]):
+        services = len(cube.service_ids)
+        offices = [cube.office_index[office_id]] if office_id else range(len(cube.office_ids))
+        service_filter = [cube.service_index[service_id]] if service_id else range(services)
+        for office in offices:
+            for service in service_filter:
+                yield office * services + service
+
+    def knows(self, office_id: Optional[str] = None, service_id: Optional[str] = None) -> bool:
+        cube = self._cube
+        return ((office_id is None or office_id in cube.office_index)
+                and (service_id is None or service_id in cube.service_index))
+
+
+def _same_totals(old: Optional[_Cube], new: _Cube) -> bool:
+    """Whether two cubes would render identical dashboards"""
+    if old is None or (old.day, old.office_ids, old.service_ids) != (new.day, new.office_ids, new.service_ids):
+        return False
+    if old.counts != new.counts:
+        return False
+    # Compare the rounded averages clients see; incremental float sums drift in the last bits
+    return all(old.times(cell) == new.times(cell) for cell in range(len(new.wait_n)))
+
+
+def _status_name(status) -> str:
+    return getattr(status, 'value', status)
+
+
+def _seconds(value) -> Optional[float]:
+    return float(value) if value is not None else None
+
+
+dashboard_aggregates = DashboardAggregates()
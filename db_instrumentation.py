@@ -0,0 +1,181 @@
+"""
+Database instrumentation for GUVNL Queue Management System
+Counts SQL statements and DB time per HTTP request and per Celery task,
+exports them to Prometheus and flags slow statements and N+1 patterns
+"""
+
+import heapq
+import logging
+import re
+import time
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+from flask import request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from prometheus_client import Histogram
+from celery.signals import task_prerun, task_postrun
+
+logger = logging.getLogger(__name__)
+
+DB_QUERY_COUNT = Histogram(
+    'guvnl_db_queries_per_unit',
+    'Number of SQL statements executed per request or task',
+    ['kind', 'name'],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100, 500, 1000, 5000)
+)
+
+DB_QUERY_TIME = Histogram(
+    'guvnl_db_time_seconds_per_unit',
+    'Total time spent in the database per request or task',
+    ['kind', 'name'],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+)
+
+_WHITESPACE = re.compile(r'\s+')
+
+_current_unit: ContextVar[Optional['UnitOfWork']] = ContextVar('db_unit_of_work', default=None)
+
+
+class UnitOfWork:
+    """Query statistics collected for a single request or Celery task"""
+
+    __slots__ = ('kind', 'name', 'query_count', 'total_time', 'slowest', 'shapes', 'flagged')
+
+    def __init__(self, kind: str, name: str):
+        self.kind = kind
+        self.name = name
+        self.query_count = 0
+        self.total_time = 0.0
+        self.slowest: List[Tuple[float, str]] = []
+        self.shapes: Dict[str, int] = {}
+        self.flagged = False
+
+    def record(self, statement: str, elapsed: float, keep_slowest: int, n_plus_one_threshold: int):
+        """Record one executed statement"""
+        self.query_count += 1
+        self.total_time += elapsed
+
+        if len(self.slowest) < keep_slowest:
+            heapq.heappush(self.slowest, (elapsed, statement))
+        elif self.slowest and elapsed > self.slowest[0][0]:
+            heapq.heapreplace(self.slowest, (elapsed, statement))
+
+        if n_plus_one_threshold:
+            # Parameters are bound separately, so the statement text is its shape
+            count = self.shapes.get(statement, 0) + 1
+            self.shapes[statement] = count
+            if count == n_plus_one_threshold:
+                self.flagged = True
+                logger.warning(
+                    f"Possible N+1 in {self.kind} {self.name}: statement executed "
+                    f"{count} times: {_shorten(statement)}"
+                )
+
+
+class DBInstrumentation:
+    """SQLAlchemy event-based query counter and timer"""
+
+    def __init__(self):
+        self.slow_query_seconds = 0.5
+        self.query_budget = 50
+        self.time_budget_seconds = 1.0
+        self.keep_slowest = 3
+        self.n_plus_one_threshold = 0
+
+    def init_app(self, app):
+        """Attach engine listeners, request hooks and Celery signals"""
+        self.slow_query_seconds = app.config['DB_SLOW_QUERY_MS'] / 1000.0
+        self.query_budget = app.config['DB_QUERY_BUDGET']
+        self.time_budget_seconds = app.config['DB_TIME_BUDGET_MS'] / 1000.0
+        self.keep_slowest = app.config['DB_LOG_SLOWEST_STATEMENTS']
+        self.n_plus_one_threshold = app.config['DB_N_PLUS_ONE_THRESHOLD']
+
+        if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+            event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+            event.listen(Engine, 'after_cursor_execute', self._after_cursor_execute)
+            event.listen(Engine, 'handle_error', _handle_error)
+
+        @app.before_request
+        def _start_request_unit():
+            self.start('request', request.endpoint or 'unknown')
+
+        @app.teardown_request
+        def _finish_request_unit(exc=None):
+            self.finish()
+
+        task_prerun.connect(self._task_prerun, weak=False, dispatch_uid='guvnl_db_instrumentation')
+        task_postrun.connect(self._task_postrun, weak=False, dispatch_uid='guvnl_db_instrumentation')
+
+    def start(self, kind: str, name: str) -> UnitOfWork:
+        """Begin collecting statistics for a unit of work"""
+        unit = UnitOfWork(kind, name)
+        _current_unit.set(unit)
+        return unit
+
+    def finish(self) -> Optional[UnitOfWork]:
+        """Stop collecting, export metrics and log budget violations"""
+        unit = _current_unit.get()
+        if unit is None:
+            return None
+        _current_unit.set(None)
+
+        DB_QUERY_COUNT.labels(unit.kind, unit.name).observe(unit.query_count)
+        DB_QUERY_TIME.labels(unit.kind, unit.name).observe(unit.total_time)
+
+        if unit.query_count > self.query_budget or unit.total_time > self.time_budget_seconds:
+            slowest = ', '.join(
+                f"{elapsed * 1000:.1f}ms {_shorten(statement)}"
+                for elapsed, statement in sorted(unit.slowest, reverse=True)
+            )
+            logger.warning(
+                f"DB budget exceeded in {unit.kind} {unit.name}: "
+                f"{unit.query_count} queries, {unit.total_time * 1000:.1f}ms; slowest: {slowest}"
+            )
+        return unit
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.get('query_start_time')
+        if not started:
+            return
+        elapsed = time.perf_counter() - started.pop()
+
+        if elapsed > self.slow_query_seconds:
+            logger.warning(f"Slow query ({elapsed * 1000:.1f}ms): {_shorten(statement)}")
+
+        unit = _current_unit.get()
+        if unit is not None:
+            unit.record(statement, elapsed, self.keep_slowest, self.n_plus_one_threshold)
+
+    def _task_prerun(self, sender=None, task=None, **kwargs):
+        self.start('task', task.name if task else 'unknown')
+
+    def _task_postrun(self, sender=None, task=None, **kwargs):
+        self.finish()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_start_time', []).append(time.perf_counter())
+
+
+def _handle_error(exception_context):
+    # A failed statement never reaches after_cursor_execute; drop its start time
+    conn = exception_context.connection
+    if conn is not None and exception_context.cursor is not None:
+        started = conn.info.get('query_start_time')
+        if started:
+            started.pop()
+
+
+def _shorten(statement: str, limit: int = 200) -> str:
+    statement = _WHITESPACE.sub(' ', statement).strip()
+    return statement if len(statement) <= limit else statement[:limit] + '...'
+
+
+def current_unit() -> Optional[UnitOfWork]:
+    """Return statistics for the request or task currently executing"""
+    return _current_unit.get()
+
+
+db_instrumentation = DBInstrumentation()
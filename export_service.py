@@ -0,0 +1,228 @@
+"""
+Export Service for GUVNL Queue Management System
+Streams appointments and notifications as CSV/NDJSON/JSON through PostgreSQL
+server-side cursors, so memory use stays flat regardless of export size
+"""
+
+import csv
+import io
+import logging
+import os
+import uuid
+import zlib
+from datetime import date, datetime, time
+from typing import Any, Dict, Iterator, List, Optional
+
+import orjson
+from flask import current_app
+from psycopg2.extras import NamedTupleCursor
+
+from app import celery, db
+from app.utils.serializers import Serializer, iter_json_list
+
+logger = logging.getLogger(__name__)
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+    'json': 'application/json',
+}
+
+EXPORTS = {
+    'appointments': {
+        'columns': [
+            'id', 'user_id', 'queue_id', 'office_id', 'service_id', 'token_number', 'status',
+            'appointment_date', 'appointment_time', 'estimated_wait_time', 'actual_wait_time',
+            'service_start_time', 'service_end_time', 'created_at', 'updated_at'
+        ],
+        'select': (
+            "SELECT a.id, a.user_id, a.queue_id, q.office_id, q.service_id, a.token_number, "
+            "a.status, a.appointment_date, a.appointment_time, a.estimated_wait_time, "
+            "a.actual_wait_time, a.service_start_time, a.service_end_time, a.created_at, a.updated_at "
+            "FROM appointments a JOIN queues q ON q.id = a.queue_id"
+        ),
+        'date_column': 'a.appointment_date',
+        'office_column': 'q.office_id',
+    },
+    'notifications': {
+        'columns': [
+            'id', 'user_id', 'appointment_id', 'office_id', 'type', 'recipient', 'subject',
+            'template_name', 'status', 'sent_at', 'delivered_at', 'retry_count',
+            'error_message', 'created_at'
+        ],
+        'select': (
+            "SELECT n.id, n.user_id, n.appointment_id, q.office_id, n.type, n.recipient, n.subject, "
+            "n.template_name, n.status, n.sent_at, n.delivered_at, n.retry_count, "
+            "n.error_message, n.created_at "
+            "FROM notifications n LEFT JOIN appointments a ON a.id = n.appointment_id "
+            "LEFT JOIN queues q ON q.id = a.queue_id"
+        ),
+        'date_column': 'n.created_at::date',
+        'office_column': 'q.office_id',
+    },
+}
+
+
+class ExportService:
+    """Builds constant-memory export streams"""
+
+    @staticmethod
+    def build_query(
+        table: str,
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None,
+        office_id: Optional[str] = None
+    ):
+        """SQL and parameters for an export with optional filters"""
+        if table not in EXPORTS:
+            raise ValueError(f'Unknown export: {table}')
+
+        spec = EXPORTS[table]
+        conditions: List[str] = []
+        params: Dict[str, Any] = {}
+        if date_from:
+            conditions.append(f"{spec['date_column']} >= %(date_from)s")
+            params['date_from'] = date_from
+        if date_to:
+            conditions.append(f"{spec['date_column']} <= %(date_to)s")
+            params['date_to'] = date_to
+        if office_id:
+            conditions.append(f"{spec['office_column']} = %(office_id)s")
+            params['office_id'] = office_id
+
+        sql = spec['select']
+        if conditions:
+            sql += ' WHERE ' + ' AND '.join(conditions)
+        return sql, params
+
+    @staticmethod
+    def iter_rows(table: str, fetch_size: Optional[int] = None, **filters) -> Iterator[tuple]:
+        """Yield rows from a server-side (named) cursor, fetch_size at a time"""
+        sql, params = ExportService.build_query(table, **filters)
+        fetch_size = fetch_size or current_app.config['EXPORT_FETCH_SIZE']
+
+        connection = db.engine.raw_connection()
+        try:
+            # Named tuples so the JSON format can dump rows with a Serializer
+            cursor = connection.cursor(name=f'export_{table}_{uuid.uuid4().hex[:12]}',
+                                       cursor_factory=NamedTupleCursor)
+            cursor.itersize = fetch_size
+            cursor.execute(sql, params)
+            while True:
+                rows = cursor.fetchmany(fetch_size)
+                if not rows:
+                    break
+                yield from rows
+            cursor.close()
+            connection.commit()
+        finally:
+            connection.close()
+
+    @staticmethod
+    def stream(table: str, fmt: str = 'csv', compress: bool = False, **filters) -> Iterator[bytes]:
+        """Encoded (and optionally gzipped) export body in chunks"""
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f'Unknown export format: {fmt}')
+
+        columns = EXPORTS[table]['columns']
+        chunk_rows = current_app.config['EXPORT_FETCH_SIZE']
+        rows = ExportService.iter_rows(table, **filters)
+        if fmt == 'json':
+            # One {"<table>": [...]} document, for clients that cannot read NDJSON
+            chunks = iter_json_list(table, rows, Serializer(*columns), chunk_size=chunk_rows)
+        else:
+            encoder = _csv_chunks if fmt == 'csv' else _ndjson_chunks
+            chunks = encoder(columns, rows, chunk_rows)
+
+        if not compress:
+            yield from chunks
+            return
+
+        # wbits=31 writes a gzip container rather than a bare zlib stream
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+        for chunk in chunks:
+            data = compressor.compress(chunk)
+            if data:
+                yield data
+        yield compressor.flush()
+
+    @staticmethod
+    def filename(table: str, fmt: str, compress: bool) -> str:
+        stamp = datetime.utcnow().strftime('%Y%m%d_%H%M%S')
+        return f"{table}_{stamp}.{fmt}{'.gz' if compress else ''}"
+
+
+def _csv_value(value: Any) -> Any:
+    if value is None:
+        return ''
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    return value
+
+
+def _csv_chunks(columns: List[str], rows: Iterator[tuple], chunk_rows: int) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    count = 0
+    for row in rows:
+        writer.writerow([_csv_value(value) for value in row])
+        count += 1
+        if count % chunk_rows == 0:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode()
+
+
+def _ndjson_chunks(columns: List[str], rows: Iterator[tuple], chunk_rows: int) -> Iterator[bytes]:
+    lines: List[bytes] = []
+    for row in rows:
+        lines.append(orjson.dumps(dict(zip(columns, row)), default=str))
+        if len(lines) >= chunk_rows:
+            yield b'\n'.join(lines) + b'\n'
+            lines = []
+    if lines:
+        yield b'\n'.join(lines) + b'\n'
+
+
+def write_export(path: str, table: str, fmt: str = 'csv', compress: bool = False, **filters) -> int:
+    """Write an export to a local file and return its size in bytes"""
+    size = 0
+    tmp_path = f'{path}.part'
+    try:
+        with open(tmp_path, 'wb') as fh:
+            for chunk in ExportService.stream(table, fmt, compress, **filters):
+                fh.write(chunk)
+                size += len(chunk)
+        os.replace(tmp_path, path)
+    except BaseException:
+        # A failed or interrupted export must not leave a partial file behind
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return size
+
+
+@celery.task(bind=True)
+def export_to_file(self, table: str, fmt: str = 'csv', compress: bool = True,
+                   date_from: Optional[str] = None, date_to: Optional[str] = None,
+                   office_id: Optional[str] = None):
+    """Run a large export off the web workers, writing it to EXPORT_DIR"""
+    export_dir = current_app.config['EXPORT_DIR']
+    os.makedirs(export_dir, exist_ok=True)
+    path = os.path.join(export_dir, ExportService.filename(table, fmt, compress))
+
+    try:
+        size = write_export(
+            path, table, fmt, compress,
+            date_from=date.fromisoformat(date_from) if date_from else None,
+            date_to=date.fromisoformat(date_to) if date_to else None,
+            office_id=office_id
+        )
+        logger.info(f"Export {table} written to {path} ({size} bytes)")
+        return {'path': path, 'bytes': size}
+
+    except Exception as e:
+        logger.error(f"Export {table} failed: {str(e)}")
+        raise
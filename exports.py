@@ -0,0 +1,114 @@
+"""
+Export routes for GUVNL Queue Management System
+Audit exports of appointments and notifications for administrators
+"""
+
+import os
+import uuid
+from datetime import date
+
+from flask import Blueprint, request, jsonify, current_app, Response, send_file, stream_with_context, url_for
+from flask_jwt_extended import jwt_required, get_jwt_identity
+
+from app.models.user import User
+from app.services.export_service import (
+    ExportService, EXPORTS, EXPORT_FORMATS, export_to_file
+)
+
+bp = Blueprint('exports', __name__)
+
+ADMIN_ROLES = ('admin', 'super_admin')
+
+
+def _parse_filters(args):
+    """Date range and office filters from the query string; ValueError if malformed"""
+    return {
+        'date_from': date.fromisoformat(args['from']) if args.get('from') else None,
+        'date_to': date.fromisoformat(args['to']) if args.get('to') else None,
+        'office_id': str(uuid.UUID(args['office_id'])) if args.get('office_id') else None,
+    }
+
+
+@bp.route('/<table>', methods=['GET'])
+@jwt_required()
+def export_table(table):
+    """Stream an export, or queue it with ?async=true for very large ranges"""
+    try:
+        user = User.query.get(get_jwt_identity())
+        if not user or user.role not in ADMIN_ROLES:
+            return jsonify({
+                'message': 'Insufficient permissions',
+                'error_code': 'INSUFFICIENT_PERMISSIONS'
+            }), 403
+
+        if table not in EXPORTS:
+            return jsonify({'message': f'Unknown export: {table}'}), 404
+
+        fmt = request.args.get('format', 'csv')
+        if fmt not in EXPORT_FORMATS:
+            return jsonify({'message': 'format must be one of: ' + ', '.join(EXPORT_FORMATS)}), 400
+
+        # Validate everything up front: once streaming starts the 200 headers are already sent
+        try:
+            filters = _parse_filters(request.args)
+        except ValueError:
+            return jsonify({'message': 'from/to must be dates (YYYY-MM-DD) and office_id a UUID'}), 400
+
+        compress = request.args.get('gzip', 'false').lower() == 'true'
+
+        if request.args.get('async', 'false').lower() == 'true':
+            task = export_to_file.delay(
+                table, fmt, compress,
+                date_from=filters['date_from'].isoformat() if filters['date_from'] else None,
+                date_to=filters['date_to'].isoformat() if filters['date_to'] else None,
+                office_id=filters['office_id']
+            )
+            return jsonify({
+                'message': 'Export queued',
+                'task_id': task.id,
+                'status_url': url_for('exports.export_job', task_id=task.id)
+            }), 202
+
+        filename = ExportService.filename(table, fmt, compress)
+        current_app.logger.info(f"Export {table} started by {user.id}")
+        return Response(
+            stream_with_context(ExportService.stream(table, fmt, compress, **filters)),
+            mimetype='application/gzip' if compress else EXPORT_FORMATS[fmt],
+            headers={'Content-Disposition': f'attachment; filename="{filename}"'}
+        )
+
+    except Exception as e:
+        current_app.logger.error(f"Export error: {str(e)}")
+        return jsonify({'message': 'Export failed'}), 500
+
+
+@bp.route('/jobs/<task_id>', methods=['GET'])
+@jwt_required()
+def export_job(task_id):
+    """Status of a queued export, or the file itself once it is written"""
+    try:
+        user = User.query.get(get_jwt_identity())
+        if not user or user.role not in ADMIN_ROLES:
+            return jsonify({
+                'message': 'Insufficient permissions',
+                'error_code': 'INSUFFICIENT_PERMISSIONS'
+            }), 403
+
+        result = export_to_file.AsyncResult(task_id)
+        if result.state == 'FAILURE':
+            return jsonify({'message': 'Export failed', 'status': result.state}), 500
+        if result.state != 'SUCCESS':
+            # PENDING also covers unknown ids: the result backend cannot tell them apart
+            return jsonify({'message': 'Export not ready', 'status': result.state}), 202
+
+        # The worker writes to EXPORT_DIR, which the API containers must share
+        export_dir = os.path.realpath(current_app.config['EXPORT_DIR'])
+        path = os.path.realpath(result.result['path'])
+        if os.path.dirname(path) != export_dir or not os.path.exists(path):
+            return jsonify({'message': 'Export file not found'}), 404
+
+        return send_file(path, as_attachment=True, download_name=os.path.basename(path))
+
+    except Exception as e:
+        current_app.logger.error(f"Export job error: {str(e)}")
+        return jsonify({'message': 'Failed to fetch export'}), 500
@@ -0,0 +1,101 @@
+"""
+Cooperative database access for GUVNL Queue Management System
+Makes psycopg2 yield to the eventlet hub while waiting on PostgreSQL and
+instruments the connection pool with wait-time metrics
+"""
+
+import logging
+import time
+
+from prometheus_client import Counter, Gauge, Histogram
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+logger = logging.getLogger(__name__)
+
+POOL_WAIT = Histogram(
+    'guvnl_db_pool_wait_seconds',
+    'Time spent waiting to check a connection out of the pool',
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+)
+
+POOL_TIMEOUTS = Counter(
+    'guvnl_db_pool_timeouts_total',
+    'Connection checkouts that gave up after pool_timeout'
+)
+
+POOL_CHECKED_OUT = Gauge(
+    'guvnl_db_pool_checked_out',
+    'Connections currently checked out of the pool',
+    multiprocess_mode='livesum'
+)
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records how long callers wait for a connection"""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            POOL_TIMEOUTS.inc()
+            raise
+        finally:
+            POOL_WAIT.observe(time.perf_counter() - started)
+
+
+@event.listens_for(InstrumentedQueuePool, 'checkout')
+def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+    POOL_CHECKED_OUT.inc()
+
+
+@event.listens_for(InstrumentedQueuePool, 'checkin')
+def _on_checkin(dbapi_connection, connection_record):
+    POOL_CHECKED_OUT.dec()
+
+
+def eventlet_wait_callback(conn, timeout=-1):
+    """psycopg2 wait callback that parks the greenlet instead of the whole hub"""
+    from eventlet.hubs import trampoline
+    from psycopg2 import extensions, OperationalError
+
+    while True:
+        state = conn.poll()
+        if state == extensions.POLL_OK:
+            break
+        elif state == extensions.POLL_READ:
+            trampoline(conn.fileno(), read=True)
+        elif state == extensions.POLL_WRITE:
+            trampoline(conn.fileno(), write=True)
+        else:
+            raise OperationalError(f'Bad result from poll: {state}')
+
+
+def make_psycopg2_green() -> bool:
+    """Install the wait callback if eventlet has monkey-patched sockets"""
+    try:
+        from eventlet import patcher
+        from psycopg2 import extensions
+    except ImportError:
+        return False
+
+    if not patcher.is_monkey_patched('socket'):
+        return False
+    extensions.set_wait_callback(eventlet_wait_callback)
+    return True
+
+
+def init_green_db(app):
+    """Configure cooperative psycopg2 and the instrumented pool before db.init_app"""
+    uri = app.config['SQLALCHEMY_DATABASE_URI']
+    if not uri.startswith('postgresql'):
+        return
+
+    engine_options = dict(app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {}))
+    engine_options.setdefault('poolclass', InstrumentedQueuePool)
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options
+
+    if app.config['DB_GREEN_CONNECTIONS'] and make_psycopg2_green():
+        logger.info('psycopg2 running in cooperative (eventlet) mode')
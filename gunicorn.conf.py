@@ -0,0 +1,38 @@
+"""
+Gunicorn configuration for the GUVNL Queue Management API
+
+With preload_app the master imports wsgi.py, builds the app and warms it
+once; workers fork from the warmed master and only reopen their own
+PostgreSQL and Redis connections. The master is never monkey-patched: the
+eventlet worker patches itself after the fork.
+
+Socket.IO long-polling needs every request of a client to reach the same
+process, and gunicorn cannot route by client, so a container runs one
+worker by default. Scale out with more containers behind nginx ip_hash;
+SOCKETIO_MESSAGE_QUEUE carries emits between them.
+"""
+
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 5000)}"
+workers = int(os.environ.get('GUNICORN_WORKERS', 1))
+worker_class = 'eventlet'
+worker_connections = int(os.environ.get('GREENLET_CONCURRENCY', 1000))
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'true').lower() == 'true'
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 60))
+graceful_timeout = 30
+accesslog = '-'
+
+
+def when_ready(server):
+    """Runs in the master after the preloaded app is built, before any worker forks"""
+    if preload_app:
+        from app.utils.warmup import warm_up
+        warm_up(server.app.wsgi())
+
+
+def post_worker_init(worker):
+    """Runs in each worker after the eventlet worker has monkey-patched it, before it serves"""
+    if preload_app:
+        from app.utils.warmup import reset_after_fork
+        reset_after_fork(worker.app.wsgi())
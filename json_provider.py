@@ -0,0 +1,77 @@
+"""
+JSON provider for GUVNL Queue Management System
+Serializes API responses with orjson, which encodes datetime, date, time
+and UUID natively, falling back to Flask's default provider without it.
+Both paths write datetimes as ISO 8601.
+"""
+
+import dataclasses
+import decimal
+import uuid
+from datetime import date, datetime, time
+from typing import Any
+
+from flask.json.provider import DefaultJSONProvider, JSONProvider
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+
+def _default(obj: Any) -> Any:
+    """Types orjson does not encode natively"""
+    if isinstance(obj, decimal.Decimal):
+        return str(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if hasattr(obj, '__html__'):
+        return str(obj.__html__())
+    raise TypeError(f'Object of type {type(obj).__name__} is not JSON serializable')
+
+
+def _iso_default(obj: Any) -> Any:
+    """Encode the types orjson handles natively the way orjson does"""
+    if isinstance(obj, (datetime, date, time)):
+        return obj.isoformat()
+    if isinstance(obj, uuid.UUID):
+        return str(obj)
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return dataclasses.asdict(obj)
+    return _default(obj)
+
+
+class ISOJSONProvider(DefaultJSONProvider):
+    """Flask's default provider, but with ISO 8601 instead of HTTP dates"""
+
+    default = staticmethod(_iso_default)
+
+
+class ORJSONProvider(JSONProvider):
+    """Flask JSON provider backed by orjson"""
+
+    option = orjson.OPT_NON_STR_KEYS if orjson else 0
+    mimetype = 'application/json'
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        return orjson.dumps(obj, default=_default, option=self.option).decode()
+
+    def dumps_bytes(self, obj: Any) -> bytes:
+        """Encode straight to bytes, skipping the str round-trip"""
+        return orjson.dumps(obj, default=_default, option=self.option)
+
+    def loads(self, s, **kwargs: Any) -> Any:
+        return orjson.loads(s)
+
+    def response(self, *args: Any, **kwargs: Any):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self.dumps_bytes(obj), mimetype=self.mimetype)
+
+
+def init_json_provider(app):
+    """Install the fastest available JSON provider on the app"""
+    if orjson is not None:
+        app.json = ORJSONProvider(app)
+    else:
+        app.json = ISOJSONProvider(app)
+        app.logger.warning('orjson not installed, using the default JSON provider')
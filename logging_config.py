@@ -0,0 +1,198 @@
+"""
+Logging pipeline for GUVNL Queue Management System
+Records are enriched and enqueued on the calling thread, then formatted as
+JSON and written to a size-rotated file by a background listener thread
+"""
+
+import atexit
+import copy
+import json
+import logging
+import os
+import random
+import uuid
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+from flask import g, has_request_context, request
+
+# Attributes every LogRecord has; anything else was passed via `extra=`
+_RESERVED_ATTRS = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime'}
+
+
+def _native_modules():
+    """Real OS threading/queue modules, even when eventlet has monkey-patched them"""
+    try:
+        from eventlet import patcher
+        return patcher.original('threading'), patcher.original('queue')
+    except ImportError:
+        import queue
+        import threading
+        return threading, queue
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line, ready for shipping to the ELK stack"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            'timestamp': datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'module': f'{record.pathname}:{record.lineno}',
+            'process': record.process,
+        }
+        for key, value in vars(record).items():
+            if key not in _RESERVED_ATTRS and not key.startswith('_'):
+                payload[key] = value
+        if record.exc_info:
+            payload['exception'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            payload['exception'] = record.exc_text
+        if record.stack_info:
+            payload['stack'] = self.formatStack(record.stack_info)
+        return json.dumps(payload, default=str)
+
+
+class RequestContextFilter(logging.Filter):
+    """Attach request id, user id and route while still on the calling thread"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if has_request_context():
+            record.request_id = g.get('request_id')
+            record.route = request.endpoint
+            # Set by flask_jwt_extended once a protected view verified the token
+            jwt_data = g.get('_jwt_extended_jwt') or {}
+            record.user_id = jwt_data.get('sub')
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Keep only a fraction of INFO-and-below records; warnings always pass"""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or self.rate >= 1.0:
+            return True
+        return random.random() < self.rate
+
+
+class DroppingQueueHandler(QueueHandler):
+    """QueueHandler that drops records instead of blocking when the queue is full"""
+
+    def __init__(self, log_queue, full_exception):
+        super().__init__(log_queue)
+        self.full_exception = full_exception
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """Freeze the message now, but leave exc_info for JSONFormatter on the listener thread
+
+        The stock prepare() formats the whole record here, which folds the
+        traceback into `message` and clears exc_info.
+        """
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except self.full_exception:
+            self.dropped += 1
+
+
+class NativeThreadQueueListener(QueueListener):
+    """QueueListener whose worker is a real thread, so disk writes never block the eventlet hub"""
+
+    def __init__(self, log_queue, *handlers, threading_module=None, respect_handler_level=False):
+        super().__init__(log_queue, *handlers, respect_handler_level=respect_handler_level)
+        self._threading = threading_module
+        self._pid = None
+
+    def start(self):
+        self._pid = os.getpid()
+        self._thread = self._threading.Thread(target=self._monitor, name='log-listener')
+        self._thread.daemon = True
+        self._thread.start()
+
+    def enqueue_sentinel(self):
+        # Blocking put: the listener is draining, and a full queue must not lose the sentinel
+        self.queue.put(self._sentinel)
+
+    def stop(self):
+        if self._thread is not None:
+            super().stop()
+
+    def restart_after_fork(self, log_queue):
+        """Start a new thread on a fresh queue in a forked child
+
+        Only the forking thread survives fork(), so a child inheriting a
+        started listener (a gunicorn worker forked from a preloaded master, a
+        Celery prefork child) would fill the queue and silently drop every
+        record. The parent's queue is replaced too: its lock may have been
+        held by the parent's listener thread at the moment of the fork.
+        """
+        if self._pid is None or self._pid == os.getpid():
+            return
+        self.queue = log_queue
+        self.start()
+
+
+def configure_logging(app) -> QueueListener:
+    """Install the asynchronous JSON logging pipeline on the root logger"""
+    threading_module, queue_module = _native_modules()
+
+    log_dir = app.config['LOG_DIR']
+    os.makedirs(log_dir, exist_ok=True)
+
+    file_handler = RotatingFileHandler(
+        os.path.join(log_dir, app.config['LOG_FILE']),
+        maxBytes=app.config['LOG_MAX_BYTES'],
+        backupCount=app.config['LOG_BACKUP_COUNT'],
+        delay=True
+    )
+    file_handler.setFormatter(JSONFormatter())
+
+    log_queue = queue_module.Queue(maxsize=app.config['LOG_QUEUE_SIZE'])
+    queue_handler = DroppingQueueHandler(log_queue, queue_module.Full)
+    queue_handler.setLevel(logging.INFO)
+    queue_handler.addFilter(SamplingFilter(app.config['LOG_INFO_SAMPLE_RATE']))
+    queue_handler.addFilter(RequestContextFilter())
+
+    listener = NativeThreadQueueListener(log_queue, file_handler, threading_module=threading_module)
+    listener.start()
+    atexit.register(listener.stop)
+
+    def restart_in_child():
+        child_queue = queue_module.Queue(maxsize=app.config['LOG_QUEUE_SIZE'])
+        queue_handler.queue = child_queue
+        listener.restart_after_fork(child_queue)
+
+    os.register_at_fork(after_in_child=restart_in_child)
+
+    root = logging.getLogger()
+    root.addHandler(queue_handler)
+    root.setLevel(logging.INFO)
+    app.logger.setLevel(logging.INFO)
+
+    def assign_request_id():
+        g.request_id = request.headers.get('X-Request-ID') or uuid.uuid4().hex
+
+    # Ahead of the hooks registered earlier, so their log records carry the id too
+    app.before_request_funcs.setdefault(None, []).insert(0, assign_request_id)
+
+    @app.after_request
+    def expose_request_id(response):
+        if 'request_id' in g:
+            response.headers['X-Request-ID'] = g.request_id
+        return response
+
+    app.log_listener = listener
+    return listener
@@ -5,21 +5,85 @@ Handles SMS, Email, and Push notification delivery via Celery background tasks
 
 import logging
 import smtplib
+from contextlib import contextmanager
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-from typing import Dict, Any, Optional
+from typing import TYPE_CHECKING, Dict, Any, List, Optional, Union
 from datetime import datetime
 
-from twilio.rest import Client as TwilioClient
-from twilio.base.exceptions import TwilioException
 from flask import current_app
 from celery import current_task
+from celery.exceptions import Retry
+from sqlalchemy import text
 
 from app import celery, db
 from app.models.notification import Notification
+from app.services.push_service import (
+    MAX_BATCH_SIZE, PushMessage, device_tokens_for_users, get_fcm_client, prune_device_tokens,
+    SENT, INVALID, RETRY
+)
+
+if TYPE_CHECKING:
+    from twilio.rest import Client as TwilioClient
 
 logger = logging.getLogger(__name__)
 
+# One Twilio client (and its keep-alive HTTP session) per worker process
+_twilio_clients: Dict[str, 'TwilioClient'] = {}
+
+# Delivery tasks wait on external providers. They are safe to redeliver (a row
+# already sent is skipped), so they ack late. Celery enforces the time limits
+# on the prefork pool only; on the eventlet notification worker the provider
+# call is bounded by provider_deadline instead.
+DELIVERY_TASK_OPTIONS = {
+    'bind': True,
+    'max_retries': 3,
+    'acks_late': True,
+    'soft_time_limit': 30,
+    'time_limit': 45,
+}
+
+# A push task carries up to MAX_BATCH_SIZE messages
+PUSH_TASK_OPTIONS = {**DELIVERY_TASK_OPTIONS, 'soft_time_limit': 120, 'time_limit': 150}
+
+
+class ProviderTimeout(Exception):
+    """A provider call outlived the task's soft time limit on the eventlet pool"""
+
+
+def _green_pool() -> bool:
+    try:
+        from eventlet import patcher
+    except ImportError:
+        return False
+    return patcher.is_monkey_patched('socket')
+
+
+@contextmanager
+def provider_deadline(seconds: float):
+    """Raise ProviderTimeout if the block runs longer than seconds under eventlet"""
+    if not _green_pool():
+        # Prefork workers: Celery's own soft/hard time limits apply
+        yield
+        return
+    import eventlet
+    with eventlet.Timeout(seconds, ProviderTimeout(f'Provider call exceeded {seconds}s')):
+        yield
+
+
+def get_twilio_client(account_sid: str, auth_token: str) -> 'TwilioClient':
+    """Cached Twilio client with a bounded HTTP timeout"""
+    client = _twilio_clients.get(account_sid)
+    if client is None:
+        # The Twilio SDK takes longer to import than the rest of this module; only SMS workers need it
+        from twilio.rest import Client as TwilioClient
+        from twilio.http.http_client import TwilioHttpClient
+
+        http_client = TwilioHttpClient(timeout=current_app.config['NOTIFICATION_PROVIDER_TIMEOUT'])
+        client = TwilioClient(account_sid, auth_token, http_client=http_client)
+        _twilio_clients[account_sid] = client
+    return client
+
 class NotificationService:
     """Service for handling different types of notifications"""
     
@@ -56,7 +120,7 @@ class NotificationService:
             elif notification_type == 'email':
                 send_email_notification.delay(notification.id)
             elif notification_type == 'push':
-                send_push_notification.delay(notification.id)
+                send_push_notification.delay([notification.id])
             
             return notification.id
             
@@ -65,6 +129,38 @@ class NotificationService:
             logger.error(f"Failed to create notification: {str(e)}")
             raise
 
+    @staticmethod
+    def create_push_notifications(notifications: List[Dict[str, Any]]) -> List[str]:
+        """Create many push notifications at once and queue them in FCM-sized batches"""
+        try:
+            records = [Notification(type='push', template_data={}, **fields) for fields in notifications]
+            db.session.add_all(records)
+            db.session.commit()
+            
+            ids = [record.id for record in records]
+            for start in range(0, len(ids), MAX_BATCH_SIZE):
+                send_push_notification.delay(ids[start:start + MAX_BATCH_SIZE])
+            
+            return ids
+            
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Failed to create push notifications: {str(e)}")
+            raise
+
+    @staticmethod
+    def push_to_users(messages: List[Dict[str, Any]]) -> List[str]:
+        """Push each message (user_id, subject, message, ...) to every device its user registered"""
+        tokens = device_tokens_for_users(list({message['user_id'] for message in messages}))
+        notifications = [
+            {**message, 'recipient': token}
+            for message in messages
+            for token in tokens.get(str(message['user_id']), ())
+        ]
+        if not notifications:
+            return []
+        return NotificationService.create_push_notifications(notifications)
+
     @staticmethod
     def get_sms_templates() -> Dict[str, str]:
         """SMS message templates"""
@@ -161,14 +257,19 @@ class NotificationService:
             }
         }
 
-@celery.task(bind=True, max_retries=3)
+@celery.task(**DELIVERY_TASK_OPTIONS)
 def send_sms_notification(self, notification_id: str):
     """Send SMS notification via Twilio"""
+    from twilio.base.exceptions import TwilioException
+
     try:
         notification = Notification.query.get(notification_id)
         if not notification:
             logger.error(f"Notification {notification_id} not found")
             return False
+        if notification.status == 'sent':
+            # Redelivered after a worker crash; already delivered
+            return True
 
         # Initialize Twilio client
         account_sid = current_app.config['TWILIO_ACCOUNT_SID']
@@ -182,14 +283,16 @@ def send_sms_notification(self, notification_id: str):
             db.session.commit()
             return False
 
-        client = TwilioClient(account_sid, auth_token)
+        client = get_twilio_client(account_sid, auth_token)
+        body, recipient = notification.message, notification.recipient
+        
+        # End the transaction so the pooled connection is free while Twilio answers;
+        # the row is reloaded on the next attribute access
+        db.session.commit()
         
         # Send SMS
-        message = client.messages.create(
-            body=notification.message,
-            from_=from_number,
-            to=notification.recipient
-        )
+        with provider_deadline(self.soft_time_limit):
+            message = client.messages.create(body=body, from_=from_number, to=recipient)
         
         # Update notification status
         notification.status = 'sent'
@@ -199,7 +302,7 @@ def send_sms_notification(self, notification_id: str):
         logger.info(f"SMS sent successfully: {message.sid}")
         return True
         
-    except TwilioException as e:
+    except (TwilioException, ProviderTimeout) as e:
         logger.error(f"Twilio error: {str(e)}")
         notification.retry_count += 1
         notification.error_message = str(e)
@@ -222,7 +325,7 @@ def send_sms_notification(self, notification_id: str):
         db.session.commit()
         return False
 
-@celery.task(bind=True, max_retries=3)
+@celery.task(**DELIVERY_TASK_OPTIONS)
 def send_email_notification(self, notification_id: str):
     """Send email notification via SMTP"""
     try:
@@ -230,6 +333,9 @@ def send_email_notification(self, notification_id: str):
         if not notification:
             logger.error(f"Notification {notification_id} not found")
             return False
+        if notification.status == 'sent':
+            # Redelivered after a worker crash; already delivered
+            return True
 
         # SMTP configuration
         smtp_server = current_app.config['SMTP_SERVER']
@@ -253,9 +359,16 @@ def send_email_notification(self, notification_id: str):
         # Add HTML content
         html_part = MIMEText(notification.message, 'html')
         msg.attach(html_part)
+        recipient = notification.recipient
+        
+        # End the transaction so the pooled connection is free during the SMTP exchange;
+        # the row is reloaded on the next attribute access
+        db.session.commit()
         
         # Send email
-        with smtplib.SMTP(smtp_server, smtp_port) as server:
+        with provider_deadline(self.soft_time_limit), smtplib.SMTP(
+            smtp_server, smtp_port, timeout=current_app.config['NOTIFICATION_PROVIDER_TIMEOUT']
+        ) as server:
             server.starttls()
             server.login(smtp_username, smtp_password)
             server.send_message(msg)
@@ -265,10 +378,10 @@ def send_email_notification(self, notification_id: str):
         notification.sent_at = datetime.utcnow()
         db.session.commit()
         
-        logger.info(f"Email sent successfully to {notification.recipient}")
+        logger.info(f"Email sent successfully to {recipient}")
         return True
         
-    except smtplib.SMTPException as e:
+    except (smtplib.SMTPException, ProviderTimeout) as e:
         logger.error(f"SMTP error: {str(e)}")
         notification.retry_count += 1
         notification.error_message = str(e)
@@ -291,47 +404,119 @@ def send_email_notification(self, notification_id: str):
         db.session.commit()
         return False
 
-@celery.task(bind=True, max_retries=3)
-def send_push_notification(self, notification_id: str):
-    """Send push notification via Firebase"""
-    try:
-        notification = Notification.query.get(notification_id)
-        if not notification:
-            logger.error(f"Notification {notification_id} not found")
-            return False
+def _mark_push_failed(notification_ids: List[str], error: str):
+    # Ids arrive as strings through Celery's JSON; psycopg2 would send them as text[]
+    db.session.execute(text(
+        "UPDATE notifications SET status = 'failed', error_message = :error "
+        "WHERE id = ANY(CAST(:ids AS uuid[])) AND status = 'pending'"
+    ), {'ids': [str(notification_id) for notification_id in notification_ids], 'error': error})
 
-        # Firebase configuration
-        firebase_config = {
-            'project_id': current_app.config['FIREBASE_PROJECT_ID'],
-            'private_key_id': current_app.config['FIREBASE_PRIVATE_KEY_ID'],
-            'private_key': current_app.config['FIREBASE_PRIVATE_KEY'],
-            'client_email': current_app.config['FIREBASE_CLIENT_EMAIL'],
-            'client_id': current_app.config['FIREBASE_CLIENT_ID'],
-        }
-        
-        if not all(firebase_config.values()):
+
+@celery.task(**PUSH_TASK_OPTIONS)
+def send_push_notification(self, notification_ids: Union[str, List[str]]):
+    """Send a batch of up to 500 push notifications via Firebase and record every outcome"""
+    if isinstance(notification_ids, str):
+        notification_ids = [notification_ids]
+    notification_ids = [str(notification_id) for notification_id in notification_ids]
+    # Rows not yet handed to FCM; only these may be marked failed if something breaks
+    unsent = notification_ids
+    try:
+        client = get_fcm_client(current_app.config)
+        if client is None:
             logger.error("Firebase configuration missing")
-            notification.status = 'failed'
-            notification.error_message = 'Firebase configuration missing'
+            _mark_push_failed(notification_ids, 'Firebase configuration missing')
             db.session.commit()
             return False
 
-        # TODO: Implement Firebase push notification logic
-        # This would require firebase-admin SDK
-        
-        # For now, mark as sent (implement actual Firebase logic)
-        notification.status = 'sent'
-        notification.sent_at = datetime.utcnow()
+        # Only pending rows: a redelivered task must not push twice. Recipients are
+        # checked against device_tokens, so a token pruned since the row was created is skipped.
+        rows = db.session.execute(text(
+            "SELECT n.id, n.recipient, n.subject, n.message, n.template_data, "
+            "d.id IS NOT NULL AS registered "
+            "FROM notifications n LEFT JOIN device_tokens d ON d.token = n.recipient "
+            "WHERE n.id = ANY(CAST(:ids AS uuid[])) AND n.type = 'push' AND n.status = 'pending'"
+        ), {'ids': notification_ids}).fetchall()
+        unregistered = [str(row.id) for row in rows if not row.registered]
+        if unregistered:
+            _mark_push_failed(unregistered, 'Device token no longer registered')
         db.session.commit()
-        
-        logger.info(f"Push notification sent to {notification.recipient}")
-        return True
-        
+        rows = [row for row in rows if row.registered]
+        if not rows:
+            return True
+
+        with provider_deadline(self.soft_time_limit):
+            results = client.send_batch([
+                PushMessage(str(row.id), row.recipient, row.subject, row.message, row.template_data)
+                for row in rows
+            ])
+        # FCM has answered for every row; a failure from here on must not mark accepted pushes failed
+        unsent = []
+
+        sent = [r.key for r in results if r.outcome == SENT]
+        invalid = [r for r in results if r.outcome == INVALID]
+        retry = [r for r in results if r.outcome == RETRY]
+        failed_by_error: Dict[str, List[str]] = {}
+        for result in results:
+            if result.outcome not in (SENT, INVALID, RETRY):
+                failed_by_error.setdefault(result.error, []).append(result.key)
+        failed_count = sum(len(ids) for ids in failed_by_error.values())
+        out_of_retries = self.request.retries >= self.max_retries
+        if out_of_retries:
+            for result in retry:
+                failed_by_error.setdefault(result.error, []).append(result.key)
+
+        # Outcomes are written back in a handful of set-based statements, not per row
+        if sent:
+            db.session.execute(text(
+                "UPDATE notifications SET status = 'sent', sent_at = CURRENT_TIMESTAMP, "
+                "error_message = NULL WHERE id = ANY(CAST(:ids AS uuid[]))"
+            ), {'ids': sent})
+        if invalid:
+            _mark_push_failed([r.key for r in invalid], 'Device token no longer registered')
+            prune_device_tokens(list({r.token for r in invalid}))
+        for error, ids in failed_by_error.items():
+            _mark_push_failed(ids, error)
+        if retry:
+            db.session.execute(text(
+                "UPDATE notifications SET retry_count = retry_count + 1, error_message = :error "
+                "WHERE id = ANY(CAST(:ids AS uuid[]))"
+            ), {'ids': [r.key for r in retry], 'error': retry[0].error})
+        db.session.commit()
+
+        logger.info(
+            f"Push batch: {len(sent)} sent, {len(invalid)} invalid tokens pruned, "
+            f"{0 if out_of_retries else len(retry)} to retry, "
+            f"{failed_count + (len(retry) if out_of_retries else 0)} failed"
+        )
+
+        if retry and not out_of_retries:
+            countdown = max([60 * (2 ** self.request.retries)] + [r.retry_after or 0 for r in retry])
+            raise self.retry(args=[[r.key for r in retry]], countdown=countdown)
+
+        return not retry
+
+    except Retry:
+        raise
+
+    except ProviderTimeout as e:
+        # No outcome was recorded, so the rows are still pending and a retry picks them up
+        logger.error(f"Push batch timed out: {str(e)}")
+        if self.request.retries < self.max_retries:
+            raise self.retry(countdown=60 * (2 ** self.request.retries))
+        _mark_push_failed(notification_ids, str(e))
+        db.session.commit()
+        return False
+
     except Exception as e:
+        db.session.rollback()
         logger.error(f"Push notification error: {str(e)}")
-        notification.status = 'failed'
-        notification.error_message = str(e)
-        db.session.commit()
+        if unsent:
+            try:
+                _mark_push_failed(unsent, str(e))
+                db.session.commit()
+            except Exception as mark_error:
+                db.session.rollback()
+                logger.error(f"Could not mark push notifications failed: {str(mark_error)}")
         return False
 
 @celery.task
@@ -339,19 +524,21 @@ def send_appointment_reminders():
     """Periodic task to send appointment reminders"""
     from app.models.appointment import Appointment
     from app.models.user import User
+    from app.services.settings_service import get_settings
     from datetime import datetime, timedelta
     
-    # Find appointments starting in the next 15-30 minutes
+    # Find appointments starting in a window one lead time from now. The window is
+    # as wide as the beat interval (REMINDER_SCAN_MINUTES) and half-open, so
+    # consecutive scans tile the day and each appointment is reminded once.
+    advance_minutes = get_settings().notification_advance_minutes
     now = datetime.utcnow()
-    reminder_start = now + timedelta(minutes=15)
-    reminder_end = now + timedelta(minutes=30)
+    reminder_start = now + timedelta(minutes=advance_minutes)
+    reminder_end = reminder_start + timedelta(minutes=current_app.config['REMINDER_SCAN_MINUTES'])
     
     appointments = Appointment.query.filter(
         Appointment.appointment_date == now.date(),
-        Appointment.appointment_time.between(
-            reminder_start.time(),
-            reminder_end.time()
-        ),
+        Appointment.appointment_time >= reminder_start.time(),
+        Appointment.appointment_time < reminder_end.time(),
         Appointment.status == 'confirmed'
     ).all()
     
@@ -366,7 +553,7 @@ def send_appointment_reminders():
                     service=appointment.queue.service.name,
                     office=appointment.queue.office.name,
                     token=appointment.token_number,
-                    minutes=15
+                    minutes=advance_minutes
                 )
                 
                 NotificationService.create_notification(
@@ -377,4 +564,54 @@ def send_appointment_reminders():
                     subject='Appointment Reminder',
                     message=message,
                     template_name='appointment_reminder'
-                )
\ No newline at end of file
+                )
+
+
+@celery.task
+def send_queue_updates(queue_id: str):
+    """Push the new position to everyone still waiting in a queue that moved"""
+    from app.services.queue_position_service import queue_positions
+
+    try:
+        positions = queue_positions.positions(queue_id)
+        if not positions:
+            return 0
+
+        queue = db.session.execute(text(
+            "SELECT o.name AS office, s.name AS service, s.estimated_duration FROM queues q "
+            "JOIN offices o ON o.id = q.office_id JOIN services s ON s.id = q.service_id "
+            "WHERE q.id = :queue_id"
+        ), {'queue_id': str(queue_id)}).first()
+        if queue is None:
+            return 0
+
+        appointments = db.session.execute(text(
+            "SELECT id, user_id, token_number FROM appointments "
+            "WHERE id = ANY(CAST(:ids AS uuid[])) AND user_id IS NOT NULL"
+        ), {'ids': list(positions)}).fetchall()
+
+        template = NotificationService.get_sms_templates()['queue_update']
+        messages = []
+        for appointment in appointments:
+            position = positions[str(appointment.id)]
+            messages.append({
+                'user_id': appointment.user_id,
+                'appointment_id': appointment.id,
+                'subject': 'Queue update',
+                'message': template.format(
+                    token=appointment.token_number,
+                    service=queue.service,
+                    office=queue.office,
+                    position=position,
+                    wait_time=(position - 1) * (queue.estimated_duration or 0)
+                ),
+                'template_name': 'queue_update',
+            })
+        # One notification per registered device, queued in FCM-sized batches
+        return len(NotificationService.push_to_users(messages))
+
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Queue update fan-out failed for queue {queue_id}: {str(e)}")
+        return 0
+
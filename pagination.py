@@ -0,0 +1,183 @@
+"""
+Pagination helpers for GUVNL Queue Management System
+Keyset (cursor) pagination for deep list endpoints, with the documented
+page/limit offset mode kept for compatibility
+"""
+
+import uuid
+from datetime import date, datetime, time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from flask import abort, current_app, jsonify, make_response, request
+from itsdangerous import BadSignature, URLSafeSerializer
+from sqlalchemy import tuple_
+
+CURSOR_SALT = 'pagination-cursor'
+
+
+class InvalidCursor(ValueError):
+    """Raised when a cursor was tampered with or belongs to another ordering"""
+
+
+def _serializer() -> URLSafeSerializer:
+    return URLSafeSerializer(current_app.config['SECRET_KEY'], salt=CURSOR_SALT)
+
+
+def _to_token(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {'dt': value.isoformat()}
+    if isinstance(value, date):
+        return {'d': value.isoformat()}
+    if isinstance(value, time):
+        return {'t': value.isoformat()}
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    return value
+
+
+def _from_token(token: Any) -> Any:
+    if isinstance(token, dict):
+        if 'dt' in token:
+            return datetime.fromisoformat(token['dt'])
+        if 'd' in token:
+            return date.fromisoformat(token['d'])
+        if 't' in token:
+            return time.fromisoformat(token['t'])
+    return token
+
+
+def encode_cursor(key_names: Sequence[str], descending: bool, values: Sequence[Any]) -> str:
+    """Opaque, signed cursor pointing just past the given key values"""
+    return _serializer().dumps({
+        'k': list(key_names),
+        'o': 'desc' if descending else 'asc',
+        'v': [_to_token(v) for v in values],
+    })
+
+
+def decode_cursor(cursor: str, key_names: Sequence[str], descending: bool) -> List[Any]:
+    """Verify a cursor and return its key values"""
+    try:
+        payload = _serializer().loads(cursor)
+    except BadSignature:
+        raise InvalidCursor('Invalid cursor')
+
+    if payload.get('k') != list(key_names) or payload.get('o') != ('desc' if descending else 'asc'):
+        raise InvalidCursor('Cursor does not match this listing')
+    try:
+        values = [_from_token(token) for token in payload['v']]
+    except (KeyError, TypeError, ValueError):
+        raise InvalidCursor('Invalid cursor')
+    if len(values) != len(key_names):
+        raise InvalidCursor('Invalid cursor')
+    return values
+
+
+def estimate_count(query) -> Optional[int]:
+    """Planner row estimate for a query (PostgreSQL only), without running COUNT(*)"""
+    session = query.session
+    connection = session.connection()
+    if connection.dialect.name != 'postgresql':
+        return None
+
+    compiled = query.order_by(None).statement.compile(dialect=connection.dialect)
+    result = connection.exec_driver_sql(
+        'EXPLAIN (FORMAT JSON) ' + str(compiled), compiled.params
+    ).scalar()
+    return int(result[0]['Plan']['Plan Rows'])
+
+
+def _limit(args, default_limit: int, max_limit: int) -> int:
+    try:
+        limit = int(args.get('limit', default_limit))
+    except (TypeError, ValueError):
+        limit = default_limit
+    return max(1, min(limit, max_limit))
+
+
+def paginate(
+    query,
+    keys: Sequence[Tuple[str, Any]],
+    descending: bool = True,
+    default_limit: int = 20,
+    max_limit: int = 100,
+    args=None
+) -> Tuple[List[Any], Dict[str, Any]]:
+    """
+    Paginate a query by cursor (``?cursor=`` or ``?pagination=cursor``) or by
+    page/limit. ``keys`` are (name, column) pairs forming a unique ordering,
+    e.g. ``[('created_at', Appointment.created_at), ('id', Appointment.id)]``;
+    the queried entity's ``id`` is appended as a tiebreaker if missing.
+
+    Returns the items and the ``pagination`` block of the response. A bad
+    cursor aborts with 400.
+    """
+    args = args if args is not None else request.args
+    limit = _limit(args, default_limit, max_limit)
+    keys = list(keys)
+    if 'id' not in (name for name, _ in keys):
+        # Without a unique last key, rows tied on the other keys are skipped or repeated across pages
+        keys.append(('id', query.column_descriptions[0]['entity'].id))
+    key_names = [name for name, _ in keys]
+    columns = [column for _, column in keys]
+
+    if 'cursor' in args or args.get('pagination') == 'cursor':
+        return _paginate_keyset(query, key_names, columns, descending, limit, args)
+    return _paginate_offset(query, columns, descending, limit, args)
+
+
+def _order(columns, descending: bool):
+    return [column.desc() if descending else column.asc() for column in columns]
+
+
+def _paginate_keyset(query, key_names, columns, descending, limit, args):
+    base_query = query
+    cursor = args.get('cursor')
+    if cursor:
+        try:
+            values = decode_cursor(cursor, key_names, descending)
+        except InvalidCursor as e:
+            abort(make_response(jsonify({'message': str(e)}), 400))
+        # Row-value comparison lets PostgreSQL seek straight into the composite index
+        if descending:
+            query = query.filter(tuple_(*columns) < tuple_(*values))
+        else:
+            query = query.filter(tuple_(*columns) > tuple_(*values))
+
+    rows = query.order_by(*_order(columns, descending)).limit(limit + 1).all()
+    has_next = len(rows) > limit
+    items = rows[:limit]
+
+    next_cursor = None
+    if has_next:
+        last = items[-1]
+        next_cursor = encode_cursor(key_names, descending, [getattr(last, name) for name in key_names])
+
+    pagination = {
+        'limit': limit,
+        'next_cursor': next_cursor,
+        'has_next': has_next,
+    }
+    if args.get('total') == 'estimate':
+        pagination['total_estimate'] = estimate_count(base_query)
+    return items, pagination
+
+
+def _paginate_offset(query, columns, descending, limit, args):
+    try:
+        page = max(1, int(args.get('page', 1)))
+    except (TypeError, ValueError):
+        page = 1
+
+    total = query.order_by(None).count()
+    items = query.order_by(*_order(columns, descending)).offset((page - 1) * limit).limit(limit).all()
+    pages = (total + limit - 1) // limit
+
+    return items, {
+        'page': page,
+        'limit': limit,
+        'total': total,
+        'pages': pages,
+        'has_next': page < pages,
+        'has_prev': page > 1,
+    }
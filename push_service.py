@@ -0,0 +1,249 @@
+"""
+Push Service for GUVNL Queue Management System
+Firebase Cloud Messaging (HTTP v1) client: one keep-alive connection pool
+and one cached OAuth access token per worker process, batches of up to 500
+device tokens sent concurrently, and a per-token outcome for each message
+"""
+
+import json
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from sqlalchemy import text
+
+from app import db
+
+logger = logging.getLogger(__name__)
+
+# Same ceiling as FCM multicast (firebase-admin send_each_for_multicast)
+MAX_BATCH_SIZE = 500
+
+OAUTH_SCOPE = 'https://www.googleapis.com/auth/firebase.messaging'
+
+# Outcomes per device token
+SENT = 'sent'
+INVALID = 'invalid'
+RETRY = 'retry'
+FAILED = 'failed'
+
+# FCM error codes meaning the token will never work again
+INVALID_TOKEN_CODES = frozenset({'UNREGISTERED', 'SENDER_ID_MISMATCH'})
+RETRYABLE_STATUS = frozenset({429, 500, 502, 503, 504})
+
+
+@dataclass
+class PushMessage:
+    """One notification to one device token"""
+    key: str
+    token: str
+    title: Optional[str]
+    body: str
+    data: Optional[Dict] = None
+
+
+@dataclass
+class PushResult:
+    key: str
+    token: str
+    outcome: str
+    error: Optional[str] = None
+    retry_after: Optional[float] = None
+
+
+class FCMClient:
+    """Sends PushMessages through the FCM HTTP v1 API"""
+
+    def __init__(
+        self,
+        project_id: str,
+        client_email: str,
+        private_key: str,
+        private_key_id: Optional[str] = None,
+        base_url: str = 'https://fcm.googleapis.com',
+        token_url: str = 'https://oauth2.googleapis.com/token',
+        timeout: float = 15,
+        max_connections: int = 50
+    ):
+        self.project_id = project_id
+        self.client_email = client_email
+        self.private_key = private_key
+        self.private_key_id = private_key_id
+        self.send_url = f'{base_url.rstrip("/")}/v1/projects/{project_id}/messages:send'
+        self.token_url = token_url
+        self.timeout = timeout
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_connections, max_retries=0)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self._executor = ThreadPoolExecutor(max_workers=max_connections, thread_name_prefix='fcm')
+
+        self._token_lock = threading.Lock()
+        self._access_token: Optional[str] = None
+        self._token_expires_at = 0.0
+
+    def access_token(self, force_refresh: bool = False) -> str:
+        """Cached OAuth access token, refreshed five minutes before it expires"""
+        if not force_refresh and self._access_token and time.time() < self._token_expires_at:
+            return self._access_token
+        with self._token_lock:
+            if force_refresh or not self._access_token or time.time() >= self._token_expires_at:
+                self._access_token, expires_in = self._fetch_access_token()
+                self._token_expires_at = time.time() + expires_in - 300
+            return self._access_token
+
+    def _fetch_access_token(self):
+        import jwt
+
+        now = int(time.time())
+        assertion = jwt.encode(
+            {
+                'iss': self.client_email,
+                'scope': OAUTH_SCOPE,
+                'aud': self.token_url,
+                'iat': now,
+                'exp': now + 3600,
+            },
+            self.private_key,
+            algorithm='RS256',
+            headers={'kid': self.private_key_id} if self.private_key_id else None
+        )
+        response = self.session.post(self.token_url, data={
+            'grant_type': 'urn:ietf:params:oauth:grant-type:jwt-bearer',
+            'assertion': assertion,
+        }, timeout=self.timeout)
+        response.raise_for_status()
+        payload = response.json()
+        return payload['access_token'], int(payload.get('expires_in', 3600))
+
+    def send_batch(self, messages: List[PushMessage]) -> List[PushResult]:
+        """Send up to MAX_BATCH_SIZE messages concurrently; one result per message, in order"""
+        if len(messages) > MAX_BATCH_SIZE:
+            raise ValueError(f'At most {MAX_BATCH_SIZE} messages per batch')
+        if not messages:
+            return []
+        token = self.access_token()
+        results = list(self._executor.map(lambda message: self._send(message, token), messages))
+
+        # Token revoked or expired early: refresh once and resend only those
+        expired = [i for i, result in enumerate(results) if result.error == 'UNAUTHENTICATED']
+        if expired:
+            token = self.access_token(force_refresh=True)
+            for i, result in zip(expired, self._executor.map(lambda i: self._send(messages[i], token), expired)):
+                results[i] = result
+        return results
+
+    def _send(self, message: PushMessage, access_token: str) -> PushResult:
+        body = {
+            'message': {
+                'token': message.token,
+                'notification': {'title': message.title, 'body': message.body},
+                # FCM data values must be strings
+                'data': {k: v if isinstance(v, str) else json.dumps(v) for k, v in (message.data or {}).items()},
+                'android': {'priority': 'high'},
+            }
+        }
+        try:
+            response = self.session.post(
+                self.send_url,
+                json=body,
+                headers={'Authorization': f'Bearer {access_token}'},
+                timeout=self.timeout
+            )
+        except requests.RequestException as e:
+            return PushResult(message.key, message.token, RETRY, error=type(e).__name__)
+
+        if response.status_code == 200:
+            return PushResult(message.key, message.token, SENT)
+
+        code = _error_code(response)
+        if response.status_code == 401:
+            return PushResult(message.key, message.token, RETRY, error='UNAUTHENTICATED')
+        if code in INVALID_TOKEN_CODES:
+            return PushResult(message.key, message.token, INVALID, error=code)
+        if response.status_code in RETRYABLE_STATUS:
+            retry_after = response.headers.get('Retry-After')
+            return PushResult(
+                message.key, message.token, RETRY, error=code,
+                retry_after=float(retry_after) if retry_after and retry_after.isdigit() else None
+            )
+        return PushResult(message.key, message.token, FAILED, error=code)
+
+
+def _error_code(response) -> str:
+    """FCM errorCode from the error details, else the Google API status"""
+    try:
+        error = response.json()['error']
+    except (ValueError, KeyError, TypeError):
+        return f'HTTP_{response.status_code}'
+    for detail in error.get('details', []):
+        if detail.get('errorCode'):
+            return detail['errorCode']
+    return error.get('status') or f'HTTP_{response.status_code}'
+
+
+_fcm_clients: Dict[str, FCMClient] = {}
+
+
+def get_fcm_client(config) -> Optional[FCMClient]:
+    """Per-process FCM client, or None if Firebase is not configured"""
+    project_id = config['FIREBASE_PROJECT_ID']
+    if not all([project_id, config['FIREBASE_CLIENT_EMAIL'], config['FIREBASE_PRIVATE_KEY']]):
+        return None
+    client = _fcm_clients.get(project_id)
+    if client is None:
+        client = FCMClient(
+            project_id=project_id,
+            client_email=config['FIREBASE_CLIENT_EMAIL'],
+            private_key=config['FIREBASE_PRIVATE_KEY'],
+            private_key_id=config['FIREBASE_PRIVATE_KEY_ID'],
+            base_url=config['FCM_BASE_URL'],
+            token_url=config['FCM_TOKEN_URL'],
+            timeout=config['NOTIFICATION_PROVIDER_TIMEOUT'],
+            max_connections=config['FCM_MAX_CONNECTIONS']
+        )
+        _fcm_clients[project_id] = client
+    return client
+
+
+def register_device_token(user_id: str, token: str, platform: Optional[str] = None):
+    """Store (or re-assign) a device's FCM registration token"""
+    db.session.execute(text(
+        "INSERT INTO device_tokens (user_id, token, platform) VALUES (:user_id, :token, :platform) "
+        "ON CONFLICT (token) DO UPDATE SET user_id = EXCLUDED.user_id, platform = EXCLUDED.platform, "
+        "last_seen_at = CURRENT_TIMESTAMP"
+    ), {'user_id': user_id, 'token': token, 'platform': platform})
+
+
+def unregister_device_token(user_id: str, token: str) -> int:
+    """Forget a device's token, e.g. when the app signs out on it"""
+    result = db.session.execute(text("DELETE FROM device_tokens WHERE user_id = :user_id AND token = :token"),
+                                {'user_id': user_id, 'token': token})
+    return result.rowcount
+
+
+def device_tokens_for_users(user_ids: List[str]) -> Dict[str, List[str]]:
+    """Registered device tokens per user; users without any are left out"""
+    if not user_ids:
+        return {}
+    tokens: Dict[str, List[str]] = {}
+    for user_id, token in db.session.execute(text(
+        "SELECT user_id, token FROM device_tokens WHERE user_id = ANY(CAST(:user_ids AS uuid[]))"
+    ), {'user_ids': [str(user_id) for user_id in user_ids]}):
+        tokens.setdefault(str(user_id), []).append(token)
+    return tokens
+
+
+def prune_device_tokens(tokens: List[str]) -> int:
+    """Forget tokens FCM reported as unregistered"""
+    if not tokens:
+        return 0
+    result = db.session.execute(text("DELETE FROM device_tokens WHERE token = ANY(:tokens)"),
+                                {'tokens': list(tokens)})
+    return result.rowcount
@@ -0,0 +1,201 @@
+"""
+Queue Position Service for GUVNL Queue Management System
+Keeps a Redis sorted set of waiting appointments per queue (scored by token
+number) so a citizen's position is a single O(log n) ZRANK
+"""
+
+import logging
+import time
+from datetime import date, datetime, time as dt_time, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from flask import current_app, has_app_context
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+
+from app import db
+
+logger = logging.getLogger(__name__)
+
+# Appointments still waiting to be called; everything else leaves the index
+WAITING_STATUSES = frozenset({'scheduled', 'confirmed'})
+
+BUILT_MARKER_KEY = 'queue:index:built'
+REBUILD_LOCK_KEY = 'queue:index:rebuild_lock'
+
+
+def _queue_key(queue_id) -> str:
+    return f'queue:{queue_id}:waiting'
+
+
+def _built_key(queue_id) -> str:
+    # Redis drops empty sorted sets, so this is what tells "empty" from "never built"
+    return f'queue:{queue_id}:built'
+
+
+def _expire_at(queue_date: Optional[date]) -> int:
+    """Keep a queue's index until QUEUE_INDEX_TTL after the end of its day, however far ahead it was booked"""
+    grace = current_app.config['QUEUE_INDEX_TTL']
+    if queue_date is None:
+        return int(time.time()) + grace
+    end_of_day = datetime.combine(queue_date + timedelta(days=1), dt_time.min)
+    return int(end_of_day.timestamp()) + grace
+
+
+def _status_name(status) -> str:
+    return getattr(status, 'value', status)
+
+
+class QueuePositionService:
+    """Live ordered index of waiting tokens per queue"""
+
+    def init_app(self, app):
+        app.extensions['queue_positions'] = self
+        if not event.contains(Session, 'after_flush', _collect_appointment_changes):
+            event.listen(Session, 'after_flush', _collect_appointment_changes)
+            event.listen(Session, 'after_commit', _apply_after_commit)
+            event.listen(Session, 'after_rollback', _discard_after_rollback)
+
+    @property
+    def redis(self):
+        return current_app.redis
+
+    def apply(self, changes: Iterable[Tuple[str, str, int, Optional[str], Optional[date]]]):
+        """Apply (queue_id, appointment_id, token_number, status, appointment_date) changes;
+        status None means deleted"""
+        pipe = self.redis.pipeline(transaction=False)
+        for queue_id, appointment_id, token_number, status, appointment_date in changes:
+            key = _queue_key(queue_id)
+            if status in WAITING_STATUSES:
+                pipe.zadd(key, {str(appointment_id): token_number})
+                pipe.expireat(key, _expire_at(appointment_date))
+            else:
+                pipe.zrem(key, str(appointment_id))
+        pipe.execute()
+
+    def position(self, queue_id, appointment_id) -> Optional[Dict[str, int]]:
+        """1-based position and people ahead, or None if the appointment is not waiting"""
+        key = _queue_key(queue_id)
+        rank = self.redis.zrank(key, str(appointment_id))
+        if rank is None and not self.redis.exists(key, _built_key(queue_id)):
+            # Index missing for this queue (evicted, flushed, written while Redis was down): reload it
+            self.rebuild([queue_id])
+            rank = self.redis.zrank(key, str(appointment_id))
+        if rank is None:
+            return None
+        return {'position': rank + 1, 'people_ahead': rank}
+
+    def positions(self, queue_id) -> Dict[str, int]:
+        """Positions of every waiting appointment in a queue, for bulk queue_update fan-out"""
+        members = self.redis.zrange(_queue_key(queue_id), 0, -1)
+        return {
+            (member.decode() if isinstance(member, bytes) else member): index + 1
+            for index, member in enumerate(members)
+        }
+
+    def waiting_count(self, queue_id) -> int:
+        return self.redis.zcard(_queue_key(queue_id))
+
+    def rebuild(self, queue_ids: Optional[List[str]] = None) -> int:
+        """Reload waiting appointments for current and future queues from PostgreSQL"""
+        sql = (
+            "SELECT a.queue_id, a.id, a.token_number FROM appointments a "
+            "WHERE a.appointment_date >= CURRENT_DATE "
+            "AND a.status IN ('scheduled', 'confirmed')"
+        )
+        queues_sql = "SELECT id, queue_date FROM queues WHERE queue_date >= CURRENT_DATE"
+        params = {}
+        if queue_ids:
+            sql += " AND a.queue_id = ANY(CAST(:queue_ids AS uuid[]))"
+            queues_sql += " AND id = ANY(CAST(:queue_ids AS uuid[]))"
+            params['queue_ids'] = [str(queue_id) for queue_id in queue_ids]
+
+        by_queue: Dict[str, Dict[str, int]] = {}
+        for queue_id, appointment_id, token_number in db.session.execute(text(sql), params):
+            by_queue.setdefault(str(queue_id), {})[str(appointment_id)] = token_number
+        # Every queue gets a built marker, including the empty ones
+        queue_dates: Dict[str, date] = {
+            str(queue_id): queue_date
+            for queue_id, queue_date in db.session.execute(text(queues_sql), params)
+        }
+
+        pipe = self.redis.pipeline(transaction=True)
+        if queue_ids:
+            for queue_id in queue_ids:
+                pipe.delete(_queue_key(queue_id))
+        else:
+            for key in self.redis.scan_iter(match='queue:*:waiting', count=1000):
+                pipe.delete(key)
+        for queue_id, members in by_queue.items():
+            pipe.zadd(_queue_key(queue_id), members)
+            pipe.expireat(_queue_key(queue_id), _expire_at(queue_dates.get(queue_id)))
+        for queue_id in queue_dates.keys() | {str(queue_id) for queue_id in queue_ids or ()}:
+            pipe.set(_built_key(queue_id), 1, exat=_expire_at(queue_dates.get(queue_id)))
+        if not queue_ids:
+            # Lapses daily so the next startup re-checks the whole index
+            pipe.set(BUILT_MARKER_KEY, 1, ex=86400)
+        pipe.execute()
+
+        total = sum(len(members) for members in by_queue.values())
+        logger.info(f"Queue position index rebuilt: {total} waiting appointments in {len(by_queue)} queues")
+        return total
+
+    def ensure_built(self):
+        """Rebuild once per Redis instance (e.g. after a Redis restart), not once per worker"""
+        if self.redis.exists(BUILT_MARKER_KEY):
+            return
+        if self.redis.set(REBUILD_LOCK_KEY, 1, nx=True, ex=300):
+            try:
+                self.rebuild()
+            finally:
+                self.redis.delete(REBUILD_LOCK_KEY)
+
+
+def _collect_appointment_changes(session, flush_context):
+    changes = session.info.setdefault('queue_index_changes', [])
+    for obj in session.new:
+        if getattr(obj, '__tablename__', None) == 'appointments':
+            # Column default applies when the status was not set explicitly
+            status = _status_name(obj.status) or 'scheduled'
+            changes.append((obj.queue_id, obj.id, obj.token_number, status, obj.appointment_date))
+    for obj in session.dirty:
+        if getattr(obj, '__tablename__', None) == 'appointments':
+            changes.append((obj.queue_id, obj.id, obj.token_number, _status_name(obj.status), obj.appointment_date))
+    for obj in session.deleted:
+        if getattr(obj, '__tablename__', None) == 'appointments':
+            changes.append((obj.queue_id, obj.id, obj.token_number, None, obj.appointment_date))
+
+
+def _apply_after_commit(session):
+    changes = session.info.pop('queue_index_changes', None)
+    if changes and has_app_context():
+        try:
+            queue_positions.apply(changes)
+        except Exception as e:
+            # The index heals on the next rebuild; never fail the committed request
+            logger.error(f"Failed to update queue position index: {str(e)}")
+            return
+        if current_app.config['QUEUE_UPDATE_PUSH']:
+            _queue_updates(changes)
+
+
+def _queue_updates(changes):
+    """Fan out queue_update pushes for today's queues that someone left; joins move nobody up"""
+    today = date.today()
+    moved = {queue_id for queue_id, _, _, status, appointment_date in changes
+             if status not in WAITING_STATUSES and appointment_date == today}
+    if not moved:
+        return
+    from app.services.notification_service import send_queue_updates
+    for queue_id in moved:
+        try:
+            send_queue_updates.delay(str(queue_id))
+        except Exception as e:
+            logger.error(f"Failed to queue position updates for queue {queue_id}: {str(e)}")
+
+
+def _discard_after_rollback(session):
+    session.info.pop('queue_index_changes', None)
+
+
+queue_positions = QueuePositionService()
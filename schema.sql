@@ -128,6 +128,16 @@ CREATE TABLE notifications (
     created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Push device registrations (FCM tokens); pruned when FCM reports them unregistered
+CREATE TABLE device_tokens (
+    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    user_id UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    token VARCHAR(255) UNIQUE NOT NULL,
+    platform VARCHAR(20), -- android/ios/web
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    last_seen_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
 -- Staff assignments to offices
 CREATE TABLE staff_assignments (
     id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
@@ -188,11 +198,17 @@ CREATE INDEX idx_appointments_user_id ON appointments(user_id);
 CREATE INDEX idx_appointments_queue_id ON appointments(queue_id);
 CREATE INDEX idx_appointments_date ON appointments(appointment_date);
 CREATE INDEX idx_appointments_status ON appointments(status);
+-- Keyset pagination orderings for appointment listings
+CREATE INDEX idx_appointments_created_at_id ON appointments(created_at DESC, id DESC);
+CREATE INDEX idx_appointments_user_created_at_id ON appointments(user_id, created_at DESC, id DESC);
+CREATE INDEX idx_appointments_date_token_id ON appointments(appointment_date, token_number, id);
+CREATE INDEX idx_appointments_date_updated_at ON appointments(appointment_date, updated_at);
 CREATE INDEX idx_queues_date ON queues(queue_date);
 CREATE INDEX idx_queues_office_service ON queues(office_id, service_id);
 CREATE INDEX idx_notifications_user_id ON notifications(user_id);
 CREATE INDEX idx_notifications_status ON notifications(status);
 CREATE INDEX idx_notifications_type ON notifications(type);
+CREATE INDEX idx_device_tokens_user_id ON device_tokens(user_id);
 CREATE INDEX idx_staff_assignments_user_id ON staff_assignments(user_id);
 CREATE INDEX idx_staff_assignments_office_id ON staff_assignments(office_id);
 CREATE INDEX idx_user_sessions_user_id ON user_sessions(user_id);
@@ -0,0 +1,105 @@
+"""
+Model serializers for GUVNL Queue Management System
+Each model's public shape is declared once here; datetimes, dates and
+UUIDs are left as-is for the JSON provider to encode
+"""
+
+from operator import attrgetter
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from flask import Response, current_app, stream_with_context
+
+
+class Serializer:
+    """Turns a model instance (or row) into a dict of the declared fields"""
+
+    __slots__ = ('fields', '_getter')
+
+    def __init__(self, *fields: str):
+        self.fields = fields
+        self._getter = attrgetter(*fields)
+
+    def dump(self, obj: Any) -> Dict[str, Any]:
+        values = self._getter(obj)
+        if len(self.fields) == 1:
+            values = (values,)
+        return dict(zip(self.fields, values))
+
+    def dump_many(self, objs: Iterable[Any]) -> List[Dict[str, Any]]:
+        return [self.dump(obj) for obj in objs]
+
+    def extend(self, *fields: str) -> 'Serializer':
+        return Serializer(*self.fields, *fields)
+
+
+USER_SUMMARY = Serializer('id', 'email', 'first_name', 'last_name', 'role')
+
+USER_LOGIN = USER_SUMMARY.extend('is_verified')
+
+USER_PROFILE = Serializer(
+    'id', 'email', 'phone', 'first_name', 'last_name', 'role', 'is_verified',
+    'date_of_birth', 'address', 'profile_picture_url', 'created_at', 'last_login_at'
+)
+
+USER_PROFILE_UPDATE = Serializer(
+    'id', 'email', 'phone', 'first_name', 'last_name', 'address', 'date_of_birth'
+)
+
+USER_TOKEN = Serializer('id', 'email', 'role')
+
+APPOINTMENT = Serializer(
+    'id', 'user_id', 'queue_id', 'token_number', 'status', 'appointment_date',
+    'appointment_time', 'estimated_wait_time', 'actual_wait_time',
+    'service_start_time', 'service_end_time', 'notes', 'created_at', 'updated_at'
+)
+
+OFFICE = Serializer(
+    'id', 'name', 'code', 'address', 'city', 'state', 'postal_code', 'phone', 'email',
+    'opening_time', 'closing_time', 'max_appointments_per_day'
+)
+
+SERVICE = Serializer('id', 'name', 'description', 'estimated_duration', 'category', 'required_documents')
+
+
+def iter_json_list(
+    key: str,
+    objs: Iterable[Any],
+    serializer: Serializer,
+    extra: Optional[Dict[str, Any]] = None,
+    chunk_size: int = 500
+) -> Iterator[bytes]:
+    """Encode {key: [...], **extra} in chunks without building the whole body in memory"""
+    dumps = getattr(current_app.json, 'dumps_bytes', None) or (
+        lambda obj: current_app.json.dumps(obj).encode()
+    )
+
+    yield b'{' + dumps(key) + b':['
+    chunk: List[bytes] = []
+    first = True
+    for obj in objs:
+        chunk.append(dumps(serializer.dump(obj)))
+        if len(chunk) >= chunk_size:
+            yield (b'' if first else b',') + b','.join(chunk)
+            first = False
+            chunk = []
+    if chunk:
+        yield (b'' if first else b',') + b','.join(chunk)
+    yield b']'
+    for name, value in (extra or {}).items():
+        yield b',' + dumps(name) + b':' + dumps(value)
+    yield b'}'
+
+
+def stream_json_list(
+    key: str,
+    objs: Iterable[Any],
+    serializer: Serializer,
+    extra: Optional[Dict[str, Any]] = None,
+    chunk_size: int = 500
+) -> Response:
+    """Stream {key: [...], **extra} as a response"""
+    return Response(
+        stream_with_context(iter_json_list(key, objs, serializer, extra, chunk_size)),
+        mimetype='application/json'
+    )
+
@@ -0,0 +1,266 @@
+"""
+Session Service for GUVNL Queue Management System
+Active sessions live in Redis with a sliding idle TTL; every authenticated
+request refreshes it in one round trip. Creation, activity and logout are
+queued in Redis and written back to `user_sessions` in batches for audit.
+"""
+
+import hashlib
+import json
+import logging
+import time
+import uuid
+from typing import Dict, List, Optional
+
+import redis
+from flask import current_app, has_request_context, request
+from sqlalchemy import text
+
+from app import celery, db, jwt
+
+logger = logging.getLogger(__name__)
+
+CREATED_KEY = 'sessions:writeback:created'
+SEEN_KEY = 'sessions:writeback:seen'
+ENDED_KEY = 'sessions:writeback:ended'
+# Batches that kept failing are kept this long for inspection
+FAILED_BATCH_TTL = 7 * 24 * 3600
+
+# Slide the idle timeout and record the activity only if the session still exists
+_TOUCH_SCRIPT = """
+if redis.call('expire', KEYS[1], ARGV[1]) == 1 then
+    redis.call('hset', KEYS[2], ARGV[2], ARGV[3])
+    return 1
+end
+return 0
+"""
+
+_INSERT_CREATED_SQL = """
+    INSERT INTO user_sessions (id, user_id, token_hash, expires_at, ip_address, user_agent, created_at)
+    SELECT r.id, r.user_id, r.token_hash, to_timestamp(r.expires_at), r.ip_address::inet,
+           r.user_agent, to_timestamp(r.created_at)
+    FROM jsonb_to_recordset(CAST(:rows AS jsonb)) AS r(
+        id uuid, user_id uuid, token_hash text, expires_at double precision,
+        ip_address text, user_agent text, created_at double precision
+    )
+    -- Users deleted since they logged in would fail the foreign key and the whole batch
+    JOIN users u ON u.id = r.user_id
+    ON CONFLICT (id) DO NOTHING
+"""
+
+_UPDATE_SEEN_SQL = """
+    UPDATE user_sessions s
+    SET expires_at = to_timestamp(r.seen_at) + make_interval(mins => :timeout)
+    FROM jsonb_to_recordset(CAST(:rows AS jsonb)) AS r(id uuid, seen_at double precision)
+    WHERE s.id = r.id AND s.is_active
+"""
+
+_UPDATE_ENDED_SQL = """
+    UPDATE user_sessions s
+    SET is_active = FALSE, expires_at = LEAST(s.expires_at, to_timestamp(r.ended_at))
+    FROM jsonb_to_recordset(CAST(:rows AS jsonb)) AS r(id uuid, ended_at double precision)
+    WHERE s.id = r.id
+"""
+
+
+def _session_key(session_id: str) -> str:
+    return f'session:{session_id}'
+
+
+def _user_index_key(user_id: str) -> str:
+    return f'user:{user_id}:sessions'
+
+
+class SessionStore:
+    """Redis-resident sessions keyed by the `sid` claim of the user's JWTs"""
+
+    def init_app(self, app):
+        app.extensions['session_store'] = self
+        jwt.token_in_blocklist_loader(_session_revoked)
+
+    @property
+    def redis(self):
+        return current_app.redis
+
+    @property
+    def idle_seconds(self) -> int:
+        return current_app.config['SESSION_TIMEOUT_MINUTES'] * 60
+
+    @staticmethod
+    def new_session_id() -> str:
+        return str(uuid.uuid4())
+
+    def create(self, session_id: str, user_id: str, refresh_token: str):
+        """Start a session for tokens minted with additional_claims={'sid': session_id}"""
+        now = time.time()
+        user_agent = request.headers.get('User-Agent', '')[:500] if has_request_context() else None
+        ip_address = request.remote_addr if has_request_context() else None
+        index_ttl = int(current_app.config['JWT_REFRESH_TOKEN_EXPIRES'].total_seconds())
+
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.hset(_session_key(session_id), mapping={
+            'user_id': user_id,
+            'created_at': now,
+            'ip_address': ip_address or '',
+            'user_agent': user_agent or '',
+        })
+        pipe.expire(_session_key(session_id), self.idle_seconds)
+        pipe.sadd(_user_index_key(user_id), session_id)
+        pipe.expire(_user_index_key(user_id), index_ttl)
+        pipe.rpush(CREATED_KEY, json.dumps({
+            'id': session_id,
+            'user_id': user_id,
+            'token_hash': hashlib.sha256(refresh_token.encode()).hexdigest(),
+            'expires_at': now + self.idle_seconds,
+            'ip_address': ip_address,
+            'user_agent': user_agent,
+            'created_at': now,
+        }))
+        pipe.execute()
+
+    def touch(self, session_id: str) -> bool:
+        """Slide the idle timeout; False if the session ended or went idle. One round trip."""
+        alive = self.redis.eval(
+            _TOUCH_SCRIPT, 2, _session_key(session_id), SEEN_KEY,
+            self.idle_seconds, session_id, time.time()
+        )
+        return bool(alive)
+
+    def is_revoked(self, jwt_payload: Dict) -> bool:
+        """True once the token's session ended or went idle; slides the timeout otherwise"""
+        session_id = jwt_payload.get('sid')
+        if session_id is None:
+            # Tokens minted without a session (pre-session tokens, internal tools) expire on their own
+            return False
+        return not self.touch(session_id)
+
+    def end(self, session_id: str, user_id: str):
+        """Log out one device"""
+        self.end_many(user_id, [session_id])
+
+    def end_all(self, user_id: str, keep: Optional[str] = None) -> int:
+        """Log out every device of a user, optionally keeping the current session"""
+        session_ids = [
+            sid.decode() if isinstance(sid, bytes) else sid
+            for sid in self.redis.smembers(_user_index_key(user_id))
+        ]
+        return self.end_many(user_id, [sid for sid in session_ids if sid != keep])
+
+    def end_many(self, user_id: str, session_ids: List[str]) -> int:
+        if not session_ids:
+            return 0
+        now = time.time()
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.delete(*[_session_key(sid) for sid in session_ids])
+        pipe.srem(_user_index_key(user_id), *session_ids)
+        pipe.hdel(SEEN_KEY, *session_ids)
+        pipe.rpush(ENDED_KEY, *[json.dumps({'id': sid, 'ended_at': now}) for sid in session_ids])
+        pipe.execute()
+        return len(session_ids)
+
+    def active_sessions(self, user_id: str) -> List[Dict]:
+        """Sessions still alive in Redis (stale index entries are dropped)"""
+        session_ids = [
+            sid.decode() if isinstance(sid, bytes) else sid
+            for sid in self.redis.smembers(_user_index_key(user_id))
+        ]
+        pipe = self.redis.pipeline(transaction=False)
+        for sid in session_ids:
+            pipe.hgetall(_session_key(sid))
+        sessions, stale = [], []
+        for sid, fields in zip(session_ids, pipe.execute()):
+            if not fields:
+                stale.append(sid)
+                continue
+            fields = {k.decode(): v.decode() for k, v in fields.items()}
+            sessions.append({
+                'id': sid,
+                'created_at': float(fields['created_at']),
+                'ip_address': fields['ip_address'] or None,
+                'user_agent': fields['user_agent'] or None,
+            })
+        if stale:
+            self.redis.srem(_user_index_key(user_id), *stale)
+        return sessions
+
+    def flush(self) -> Dict[str, int]:
+        """Write queued session events to user_sessions in three set-based statements"""
+        counts = {'created': 0, 'seen': 0, 'ended': 0}
+
+        created_key = self._claim(CREATED_KEY)
+        if created_key:
+            rows = self.redis.lrange(created_key, 0, -1)
+            db.session.execute(text(_INSERT_CREATED_SQL), {'rows': _json_array(rows)})
+            counts['created'] = len(rows)
+
+        seen_key = self._claim(SEEN_KEY)
+        if seen_key:
+            seen = self.redis.hgetall(seen_key)
+            rows = [{'id': sid.decode(), 'seen_at': float(ts)} for sid, ts in seen.items()]
+            db.session.execute(text(_UPDATE_SEEN_SQL), {
+                'rows': json.dumps(rows),
+                'timeout': current_app.config['SESSION_TIMEOUT_MINUTES'],
+            })
+            counts['seen'] = len(rows)
+
+        ended_key = self._claim(ENDED_KEY)
+        if ended_key:
+            rows = self.redis.lrange(ended_key, 0, -1)
+            db.session.execute(text(_UPDATE_ENDED_SQL), {'rows': _json_array(rows)})
+            counts['ended'] = len(rows)
+
+        db.session.commit()
+        # Only drop the claimed events once they are committed
+        claimed = [key for key in (created_key, seen_key, ended_key) if key]
+        if claimed:
+            self.redis.delete(*claimed, *[f'{key}:attempts' for key in claimed])
+        return counts
+
+    def _claim(self, key: str) -> Optional[str]:
+        """Move pending events aside; leftovers from a failed flush are retried first,
+        up to SESSION_WRITEBACK_MAX_RETRIES times before they are parked under `<key>:failed:<ts>`"""
+        flushing = f'{key}:flushing'
+        if self.redis.exists(flushing):
+            attempts = self.redis.incr(f'{flushing}:attempts')
+            if attempts <= current_app.config['SESSION_WRITEBACK_MAX_RETRIES']:
+                return flushing
+            # Stop a batch that can never commit from blocking every later flush
+            failed = f'{key}:failed:{int(time.time())}'
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.rename(flushing, failed)
+            pipe.expire(failed, FAILED_BATCH_TTL)
+            pipe.delete(f'{flushing}:attempts')
+            pipe.execute()
+            logger.error(f"Session write-back: gave up on {flushing} after {attempts - 1} retries, kept as {failed}")
+        try:
+            self.redis.rename(key, flushing)
+        except redis.ResponseError:
+            # Nothing queued
+            return None
+        return flushing
+
+
+def _json_array(rows: List[bytes]) -> str:
+    return '[' + ','.join(row.decode() if isinstance(row, bytes) else row for row in rows) + ']'
+
+
+def _session_revoked(jwt_header, jwt_payload) -> bool:
+    """flask_jwt_extended blocklist hook: a token is revoked once its session is gone"""
+    return session_store.is_revoked(jwt_payload)
+
+
+session_store = SessionStore()
+
+
+@celery.task
+def flush_session_writeback():
+    """Periodic task: batch session audit writes into user_sessions"""
+    try:
+        counts = session_store.flush()
+        if any(counts.values()):
+            logger.info(f"Session write-back: {counts}")
+        return counts
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Session write-back error: {str(e)}")
+        return None
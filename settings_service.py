@@ -0,0 +1,211 @@
+"""
+Settings Service for GUVNL Queue Management System
+Serves the `settings` table from an immutable per-process snapshot that is
+reloaded when any process publishes an invalidation over Redis pub/sub
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, fields, replace
+from datetime import time as dt_time
+from typing import Any, Callable, Dict, Optional
+
+from flask import current_app
+from prometheus_client import Histogram
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+
+from app import db
+
+logger = logging.getLogger(__name__)
+
+INVALIDATION_CHANNEL = 'settings:invalidate'
+
+SETTINGS_PROPAGATION = Histogram(
+    'guvnl_settings_propagation_seconds',
+    'Delay between a settings change being published and applied in this process',
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5, 30)
+)
+
+
+def _parse_time(value: str) -> dt_time:
+    return dt_time.fromisoformat(value)
+
+
+@dataclass(frozen=True)
+class SystemSettings:
+    """Typed, read-only view of the settings table"""
+    system_name: str = 'GUVNL Queue Management System'
+    max_advance_booking_days: int = 30
+    default_appointment_duration: int = 30
+    notification_advance_minutes: int = 15
+    max_appointments_per_day: int = 100
+    system_timezone: str = 'Asia/Kolkata'
+    working_hours_start: dt_time = dt_time(9, 0)
+    working_hours_end: dt_time = dt_time(17, 0)
+    lunch_break_start: dt_time = dt_time(13, 0)
+    lunch_break_end: dt_time = dt_time(14, 0)
+    version: int = 0
+
+
+_PARSERS: Dict[type, Callable[[str], Any]] = {
+    int: int,
+    str: str,
+    dt_time: _parse_time,
+}
+
+_FIELD_TYPES = {f.name: f.type for f in fields(SystemSettings) if f.name != 'version'}
+
+
+def defaults_from_config(config) -> SystemSettings:
+    """Env-based values from Config, used when a row is missing from the table"""
+    return SystemSettings(
+        max_advance_booking_days=config['QUEUE_ADVANCE_BOOKING_DAYS'],
+        default_appointment_duration=config['DEFAULT_APPOINTMENT_DURATION'],
+        notification_advance_minutes=config['NOTIFICATION_ADVANCE_MINUTES'],
+        max_appointments_per_day=config['MAX_APPOINTMENTS_PER_DAY'],
+        system_timezone=config['CELERY_TIMEZONE'],
+    )
+
+
+class SettingsService:
+    """Process-wide settings snapshot with pub/sub invalidation"""
+
+    def __init__(self):
+        self._snapshot: Optional[SystemSettings] = None
+        self._load_lock = threading.Lock()
+        self._app = None
+        self._subscriber: Optional[threading.Thread] = None
+        os.register_at_fork(after_in_child=self.reset_after_fork)
+
+    def init_app(self, app):
+        self._app = app
+        app.extensions['settings_service'] = self
+        if not event.contains(Session, 'after_flush', _track_settings_changes):
+            event.listen(Session, 'after_flush', _track_settings_changes)
+            event.listen(Session, 'after_commit', _publish_after_commit)
+            event.listen(Session, 'after_rollback', _discard_after_rollback)
+
+    def get(self) -> SystemSettings:
+        """Current snapshot; a plain attribute read once loaded"""
+        snapshot = self._snapshot
+        if snapshot is None:
+            with self._load_lock:
+                if self._snapshot is None:
+                    self._snapshot = self._load()
+                    self._start_subscriber()
+                snapshot = self._snapshot
+        return snapshot
+
+    def reset_after_fork(self):
+        """Forget the parent's snapshot and subscriber; the child loads its own on first use
+
+        Threads do not survive fork(), so a child keeping the parent's snapshot
+        would never see another invalidation.
+        """
+        self._snapshot = None
+        self._subscriber = None
+        self._load_lock = threading.Lock()
+
+    def reload(self) -> SystemSettings:
+        snapshot = self._load()
+        self._snapshot = snapshot
+        return snapshot
+
+    def _load(self) -> SystemSettings:
+        app = self._app or current_app._get_current_object()
+        snapshot = defaults_from_config(app.config)
+        values: Dict[str, Any] = {}
+        try:
+            # A separate app context keeps this off the caller's session/transaction
+            with app.app_context():
+                rows = db.session.execute(text('SELECT key, value FROM settings')).fetchall()
+                db.session.remove()
+        except Exception as e:
+            logger.error(f"Failed to load settings, using defaults: {str(e)}")
+            return snapshot
+
+        for key, value in rows:
+            field_type = _FIELD_TYPES.get(key)
+            if field_type is None or value is None:
+                continue
+            try:
+                values[key] = _PARSERS[field_type](value)
+            except ValueError:
+                logger.warning(f"Ignoring invalid value for setting {key}: {value!r}")
+
+        previous = self._snapshot.version if self._snapshot else 0
+        return replace(snapshot, version=previous + 1, **values)
+
+    def update(self, key: str, value: Any):
+        """Persist a setting and invalidate every process's snapshot"""
+        if key not in _FIELD_TYPES:
+            raise ValueError(f'Unknown setting: {key}')
+        raw = value.strftime('%H:%M') if isinstance(value, dt_time) else str(value)
+        _PARSERS[_FIELD_TYPES[key]](raw)
+
+        db.session.execute(
+            text('UPDATE settings SET value = :value WHERE key = :key'),
+            {'key': key, 'value': raw}
+        )
+        db.session.info['settings_changed'] = True
+        db.session.commit()
+
+    def publish_invalidation(self):
+        """Tell every process (including this one) to reload"""
+        self.reload()
+        (self._app or current_app).redis.publish(INVALIDATION_CHANNEL, json.dumps({'published_at': time.time()}))
+
+    def _start_subscriber(self):
+        if self._app is None or self._subscriber is not None:
+            return
+        self._subscriber = threading.Thread(target=self._listen, name='settings-subscriber', daemon=True)
+        self._subscriber.start()
+
+    def _listen(self):
+        while True:
+            try:
+                pubsub = self._app.redis.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(INVALIDATION_CHANNEL)
+                # Changes made while we were disconnected
+                self.reload()
+                for message in pubsub.listen():
+                    self.reload()
+                    try:
+                        published_at = json.loads(message['data'])['published_at']
+                        SETTINGS_PROPAGATION.observe(max(time.time() - published_at, 0))
+                    except (ValueError, KeyError, TypeError):
+                        pass
+            except Exception as e:
+                logger.warning(f"Settings subscriber reconnecting: {str(e)}")
+                time.sleep(self._app.config['SETTINGS_RESUBSCRIBE_SECONDS'])
+
+
+def _track_settings_changes(session, flush_context):
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if getattr(obj, '__tablename__', None) == 'settings':
+            session.info['settings_changed'] = True
+            return
+
+
+def _publish_after_commit(session):
+    if session.info.pop('settings_changed', False):
+        try:
+            settings_service.publish_invalidation()
+        except Exception as e:
+            logger.error(f"Failed to publish settings invalidation: {str(e)}")
+
+
+def _discard_after_rollback(session):
+    session.info.pop('settings_changed', None)
+
+
+settings_service = SettingsService()
+
+
+def get_settings() -> SystemSettings:
+    """Shortcut for the current settings snapshot"""
+    return settings_service.get()
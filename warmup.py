@@ -0,0 +1,95 @@
+"""
+Startup warm-up for GUVNL Queue Management System
+Pays the one-time costs of the first request (route matcher, JSON provider,
+SQLAlchemy mappers and dialect, modules imported on first use) once in the
+gunicorn master before workers fork, and resets the connections each worker
+must open for itself after the fork
+"""
+
+import importlib
+import logging
+import time
+import uuid
+from datetime import datetime
+from decimal import Decimal
+from typing import Dict
+
+from sqlalchemy import text
+from sqlalchemy.orm import configure_mappers
+
+from app import db
+from app.services.dashboard_service import dashboard_aggregates
+from app.services.settings_service import settings_service
+from app.utils.green_db import make_psycopg2_green
+
+logger = logging.getLogger(__name__)
+
+# Imported inside request handlers on first use; loading them here shares them across workers
+PRELOAD_MODULES = (
+    'app.services.notification_service',
+)
+
+
+def warm_up(app) -> Dict[str, float]:
+    """Warm app before fork; returns seconds per step. Opens no connection that outlives it."""
+    timings: Dict[str, float] = {}
+
+    def step(name, fn):
+        started = time.perf_counter()
+        try:
+            fn()
+        except Exception as e:
+            logger.warning(f"Warm-up step {name} failed: {str(e)}")
+        timings[name] = time.perf_counter() - started
+
+    def routes():
+        # Werkzeug builds its matcher lazily on the first match
+        app.url_map.bind('localhost').match('/api', method='GET')
+
+    def json_provider():
+        with app.app_context():
+            app.json.response({
+                'id': uuid.uuid4(),
+                'created_at': datetime.utcnow(),
+                'amount': Decimal('1.00'),
+                'items': [{'status': 'waiting', 'position': 1}],
+            })
+
+    def database():
+        with app.app_context():
+            configure_mappers()
+            # The first connection initialises the dialect (server version, type info)
+            with db.engine.connect() as conn:
+                conn.execute(text('SELECT 1'))
+            # Workers must not inherit pooled connections
+            db.engine.dispose()
+
+    def modules():
+        for name in PRELOAD_MODULES:
+            importlib.import_module(name)
+
+    step('routes', routes)
+    step('json', json_provider)
+    step('database', database)
+    step('modules', modules)
+
+    logger.info('Warm-up: ' + ', '.join(f'{name} {seconds * 1000:.0f} ms' for name, seconds in timings.items()))
+    return timings
+
+
+def reset_after_fork(app):
+    """Forget connections inherited from the master without closing the master's sockets
+
+    Call it once the worker is monkey-patched, so the new pools get green
+    locks and psycopg2 can be made cooperative: the unpatched master could not.
+    Locks the master's services created are native for the same reason, so
+    they are recreated here too. The log listener thread restarts by itself
+    in forked children.
+    """
+    if app.config['DB_GREEN_CONNECTIONS'] and make_psycopg2_green():
+        logger.info('psycopg2 running in cooperative (eventlet) mode')
+    with app.app_context():
+        db.engine.dispose(close=False)
+    app.redis.connection_pool.reset()
+    settings_service.reset_after_fork()
+    dashboard_aggregates.reset_after_fork()
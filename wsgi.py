@@ -0,0 +1,22 @@
+"""
+GUVNL Queue Management System - WSGI entry point for gunicorn
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+app.py remains the entry point for the development server and the flask CLI.
+
+No eventlet.monkey_patch() here: with preload_app this module is imported by
+the gunicorn master, and patching there would swap the arbiter's own
+sockets, signals and locks for green ones. gunicorn's eventlet worker
+patches each worker after the fork; whatever needs the patched modules is
+set up afterwards by the post_worker_init hook in gunicorn.conf.py.
+"""
+
+import os
+
+from dotenv import load_dotenv
+from app import create_app
+
+load_dotenv()
+
+app = create_app(os.getenv('FLASK_ENV', 'production'))